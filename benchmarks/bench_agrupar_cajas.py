@@ -0,0 +1,25 @@
+# benchmarks/bench_agrupar_cajas.py
+"""
+Mide el tiempo de utils.comunes.agrupar_cajas con pedidos sintéticos.
+Uso: python -m benchmarks.bench_agrupar_cajas
+"""
+import time
+
+from benchmarks.sinteticos import bultos_de_lpns, nombres_lpn
+from utils.comunes import agrupar_cajas
+
+TAMANOS = [1_000, 10_000, 100_000]
+
+
+def main():
+    print(f"{'Bultos':>8} {'Segundos':>10} {'µs/bulto':>10} {'Grupos':>8}")
+    for n in TAMANOS:
+        bultos = bultos_de_lpns(nombres_lpn(n))
+        inicio = time.perf_counter()
+        agrupados = agrupar_cajas(bultos)
+        segundos = time.perf_counter() - inicio
+        print(f"{n:>8} {segundos:>10.4f} {segundos / n * 1e6:>10.2f} {len(agrupados):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_arranque.py
+"""
+Mide el tiempo de arranque de la aplicación en procesos nuevos: importar main
+(lo que tarda en aparecer el menú), los módulos pesados que quedan cargados y
+la carga de cada cliente la primera vez y desde el registro.
+Con --exe se mide también el ejecutable de PyInstaller (se ejecuta con --help).
+Uso: python -m benchmarks.bench_arranque [--repeticiones 5] [--exe dist/UpperApp/UpperApp.exe]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+MODULOS_PESADOS = ("pandas", "numpy", "openpyxl", "tkinter", "questionary")
+CLIENTES = ("Codelco", "Collahuasi", "Tottus")
+
+CODIGO_CLIENTE = """
+import time
+inicio = time.perf_counter()
+from utils.registro_clientes import cargar_cliente
+cargar_cliente({cliente!r})
+primera = time.perf_counter() - inicio
+inicio = time.perf_counter()
+cargar_cliente({cliente!r})
+print(primera, time.perf_counter() - inicio)
+"""
+
+
+def medir_comando(comando, repeticiones):
+    """
+    Mediana de segundos que tarda un comando en un proceso nuevo.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run(comando, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+
+def modulos_cargados():
+    codigo = f"import sys, main; print(' '.join(m for m in {MODULOS_PESADOS!r} if m in sys.modules))"
+    salida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+    return salida.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque de UpperApp")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--exe", help="Ejecutable de PyInstaller a medir")
+    args = parser.parse_args()
+
+    interprete = medir_comando([sys.executable, "-c", "pass"], args.repeticiones)
+    importar = medir_comando([sys.executable, "-c", "import main"], args.repeticiones)
+    print(f"{'Medición':<32} {'Segundos':>10}")
+    print(f"{'Intérprete vacío':<32} {interprete:>10.3f}")
+    print(f"{'import main':<32} {importar:>10.3f}")
+    print(f"{'import main (sin intérprete)':<32} {importar - interprete:>10.3f}")
+    if args.exe:
+        print(f"{'Ejecutable --help':<32} {medir_comando([args.exe, '--help'], args.repeticiones):>10.3f}")
+    print(f"\nMódulos pesados cargados al abrir el menú: {', '.join(modulos_cargados()) or 'ninguno'}")
+
+    print(f"\n{'Cliente':<12} {'Primera carga':>14} {'Registro':>10}")
+    for cliente in CLIENTES:
+        salida = subprocess.run(
+            [sys.executable, "-c", CODIGO_CLIENTE.format(cliente=cliente)],
+            capture_output=True, text=True, check=True,
+        )
+        primera, cacheada = map(float, salida.stdout.split()[-2:])
+        print(f"{cliente:<12} {primera:>14.3f} {cacheada * 1e6:>8.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
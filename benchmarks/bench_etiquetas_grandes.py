@@ -0,0 +1,35 @@
+# benchmarks/bench_etiquetas_grandes.py
+"""
+Mide el tiempo de clientes.collahuasi.generar_etiquetas_grandes con pedidos sintéticos.
+El tiempo por bulto debe mantenerse estable al crecer el pedido.
+Uso: python -m benchmarks.bench_etiquetas_grandes
+"""
+import time
+
+from benchmarks.sinteticos import bultos_de_lpns, generar_pallets, nombres_lpn
+from clientes.collahuasi import generar_etiquetas_grandes
+
+TAMANOS = [10_000, 100_000]
+
+
+def generar_pedido(n, semilla=0):
+    """
+    Genera n bultos sueltos y n LPN en pallets (ver sinteticos.generar_pallets).
+    """
+    bultos = bultos_de_lpns(nombres_lpn(n), semilla)
+    bultos["LPN"] = bultos["LPN"].astype("category")
+    return bultos, generar_pallets(n, semilla=semilla)
+
+
+def main():
+    print(f"{'Bultos':>8} {'Segundos':>10} {'µs/bulto':>10} {'Etiquetas':>10}")
+    for n in TAMANOS:
+        bultos, pallets = generar_pedido(n)
+        inicio = time.perf_counter()
+        etiquetas = generar_etiquetas_grandes(bultos, pallets, "OC", "GUIA", "ASN")
+        segundos = time.perf_counter() - inicio
+        print(f"{n:>8} {segundos:>10.4f} {segundos / n * 1e6:>10.2f} {len(etiquetas):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# benchmarks/bench_paletizado.py
+"""
+Mide velocidad y calidad de utils.paletizado.asignar_pallets con bultos sintéticos.
+La calidad es la cantidad de pallets usados frente a la cota inferior teórica.
+Uso: python -m benchmarks.bench_paletizado
+"""
+import time
+
+from benchmarks.sinteticos import bultos_de_lpns, nombres_lpn
+from utils.paletizado import BASE_PALLET, FACTOR_LLENADO, asignar_pallets, cota_inferior
+
+TAMANOS = [1_000, 5_000, 10_000]
+PESO_MAX = 500.0
+ALTO_MAX = 150.0
+
+
+def generar_bultos(n, semilla=0):
+    """
+    Volumen (cm³) y peso (kg) de n bultos sintéticos.
+    """
+    bultos = bultos_de_lpns(nombres_lpn(n), semilla)
+    volumenes = bultos[["Alto (cm)", "Largo (cm)", "Ancho (cm)"]].prod(axis=1).to_numpy(dtype=float)
+    return volumenes, bultos["Peso (kg)"].to_numpy()
+
+
+def main():
+    cap_volumen = BASE_PALLET[0] * BASE_PALLET[1] * ALTO_MAX * FACTOR_LLENADO
+    print(f"{'Bultos':>8} {'Heurística':>12} {'Segundos':>10} {'Pallets':>8} {'Cota':>6} {'Exceso':>8}")
+    for n in TAMANOS:
+        volumenes, pesos = generar_bultos(n)
+        cota = cota_inferior(volumenes, pesos, cap_volumen, PESO_MAX)
+        for nombre, mejor_ajuste in (("FFD", False), ("BFD", True)):
+            inicio = time.perf_counter()
+            asignacion = asignar_pallets(volumenes, pesos, cap_volumen, PESO_MAX, mejor_ajuste=mejor_ajuste)
+            segundos = time.perf_counter() - inicio
+            pallets = asignacion.max() + 1
+            print(f"{n:>8} {nombre:>12} {segundos:>10.4f} {pallets:>8} {cota:>6} {pallets / cota - 1:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
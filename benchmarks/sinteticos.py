@@ -0,0 +1,160 @@
+# benchmarks/sinteticos.py
+"""
+Pedidos sintéticos para los benchmarks: exportaciones WMS (LPN, CodItem,
+NomItem, Unidades), OC de retail como las de Tottus/Sodimac y las respuestas
+que un operador daría a cada cliente para procesarlas sin interacción.
+"""
+import numpy as np
+import pandas as pd
+
+# Distribución de items por LPN: la mayoría de las cajas lleva un solo CodItem
+ITEMS_POR_LPN = np.array([1, 2, 3, 4])
+PROB_ITEMS_POR_LPN = np.array([0.6, 0.25, 0.1, 0.05])
+NOMBRES = ["STEITZ", "BRUBECK", "BRU M", "GUANTE NITRILO", "CASCO BLANCO", "LENTE CLARO", "ZAPATO T42"]
+CAJAS = 6
+
+
+def generar_wms(filas, coditems=None, semilla=0):
+    """
+    Exportación WMS con filas filas: LPN con 1 a 4 CodItem distintos.
+    :param coditems: cantidad de CodItem distintos; por defecto crece con la raíz de filas
+    :return: DataFrame con columnas LPN, CodItem, NomItem, Unidades
+    """
+    rng = np.random.default_rng(semilla)
+    coditems = coditems or max(10, int(np.sqrt(filas)) * 2)
+    tamanos = rng.choice(ITEMS_POR_LPN, size=filas, p=PROB_ITEMS_POR_LPN)
+    tamanos = tamanos[np.cumsum(tamanos) <= filas]
+    if tamanos.sum() < filas:
+        tamanos = np.append(tamanos, filas - tamanos.sum())
+
+    lpn = np.repeat(np.arange(len(tamanos)), tamanos)
+    # Dentro de un LPN los CodItem no se repiten: base aleatoria más la posición en el LPN
+    posicion = np.arange(filas) - np.repeat(np.cumsum(tamanos) - tamanos, tamanos)
+    coditem = (rng.integers(0, coditems, len(tamanos))[lpn] + posicion) % coditems
+    catalogo = np.arange(1_000_000, 1_000_000 + coditems)
+    return pd.DataFrame({
+        "LPN": [f"SAL{i:010d}" for i in lpn],
+        "CodItem": catalogo[coditem],
+        "NomItem": np.array(NOMBRES, dtype=object)[coditem % len(NOMBRES)],
+        "Unidades": rng.integers(1, 50, filas),
+    })
+
+
+def generar_oc(filas, semilla=0):
+    """
+    Exportación de OC de retail (formato OC_RETAIL de data/importacion_db.json),
+    con algunas fechas en formatos distintos y textos UTF-8 mal leídos como latin1.
+    """
+    rng = np.random.default_rng(semilla)
+    fechas = np.array(["25-07-2025", "25/07/2025", "2025-07-25", "25-07-2025 10:15:00"], dtype=object)
+    razones = np.array(["COMERCIALIZADORA JAL LIMITADA", "CompaÃ±Ã­a Ã‘uble SpA"], dtype=object)
+    return pd.DataFrame({
+        "Número OC": np.full(filas, "46988488", dtype=object),
+        "Tax id proveedor": "76182815-0",
+        "Razón social": razones[rng.integers(0, len(razones), filas)],
+        "Fecha de emisión": fechas[rng.integers(0, len(fechas), filas)],
+        "Fecha fin recepción": "05-08-2025",
+        "SKU": rng.integers(100_000, 999_999, filas).astype(str),
+        "Unidades compradas": rng.integers(1, 200, filas) * 6,
+        "Unidades dimensión logística": 6,
+    })
+
+
+def escribir_csv(df, path):
+    # Las exportaciones reales vienen en latin1
+    df.to_csv(path, index=False, encoding="latin1", errors="replace")
+    return path
+
+
+# Cajas de los bultos sintéticos (las del catálogo GSP más usadas)
+TIPOS_CAJA = pd.DataFrame({
+    "TipoCaja": ["GSP 1", "GSP 2", "GSP 3", "GSP 4", "Steitz 5"],
+    "Alto (cm)": [14, 31, 20, 36, 36],
+    "Largo (cm)": [26, 40, 56, 56, 60],
+    "Ancho (cm)": [15, 31, 40, 40, 46],
+})
+BULTOS_POR_PALLET = 20
+
+
+def nombres_lpn(n, prefijo="SAL"):
+    return [f"{prefijo}{i:010d}" for i in range(n)]
+
+
+def bultos_de_lpns(lpns, semilla=0):
+    """
+    Un bulto pesado por LPN: caja al azar de TIPOS_CAJA y peso entre 1 y 30 kg.
+    :return: DataFrame con LPN, Peso (kg), TipoCaja, Alto (cm), Largo (cm), Ancho (cm)
+    """
+    rng = np.random.default_rng(semilla)
+    lpns = pd.Series(lpns).reset_index(drop=True)
+    bultos = TIPOS_CAJA.iloc[rng.integers(0, len(TIPOS_CAJA), len(lpns))].reset_index(drop=True)
+    bultos.insert(0, "LPN", lpns)
+    bultos.insert(1, "Peso (kg)", rng.uniform(1, 30, len(lpns)).round(2))
+    return bultos
+
+
+def generar_bultos(df_wms, semilla=0):
+    """
+    Bultos pesados de un pedido, como los arma Collahuasi: un bulto por LPN.
+    """
+    return bultos_de_lpns(df_wms["LPN"].drop_duplicates(), semilla)
+
+
+def generar_pallets(n, bultos_por_pallet=BULTOS_POR_PALLET, semilla=0):
+    """
+    n LPN paletizados como el df_pallets de Collahuasi: bultos_por_pallet LPN por
+    pallet, cada uno con el peso total de su pallet (entre 100 y 900 kg).
+    """
+    rng = np.random.default_rng(semilla)
+    cantidad = n // bultos_por_pallet + 1
+    return pd.DataFrame({
+        "Pallet": [f"Pallet {i // bultos_por_pallet + 1}" for i in range(n)],
+        "LPN": nombres_lpn(n, "PAL"),
+        "Peso (kg)": np.repeat(rng.uniform(100, 900, cantidad).round(1), bultos_por_pallet)[:n],
+    })
+
+
+def generar_coditem_db(df_wms):
+    """
+    Datos de CodItem para etiquetas y guías: NItem, NroParte y Material de cada CodItem del pedido.
+    """
+    coditems = df_wms[["CodItem", "NomItem"]].drop_duplicates("CodItem")
+    return {
+        str(c): {"NomItem": n, "Material": f"M{c}", "NItem": i * 10, "NroParte": f"NP-{c}"}
+        for i, (c, n) in enumerate(coditems.itertuples(index=False, name=None), 1)
+    }
+
+
+def _pesos_y_cajas(df_wms, semilla):
+    rng = np.random.default_rng(semilla)
+    n = df_wms["LPN"].nunique()
+    pesos = rng.uniform(1, 30, n).round(2)
+    cajas = rng.integers(0, CAJAS, n)
+    return [str(r) for par in zip(pesos, cajas) for r in par]
+
+
+def respuestas_collahuasi(df_wms, semilla=0):
+    """
+    Respuestas de un pedido Collahuasi sin pallets, con guía y etiquetas ZPL.
+    Los CodItem sintéticos no están en la base, así que se pide NItem y Nro Parte de cada uno.
+    """
+    coditems = df_wms["CodItem"].drop_duplicates()
+    respuestas = ["Lista", "No"] + _pesos_y_cajas(df_wms, semilla) + ["Sí"]
+    for i, coditem in enumerate(coditems, 1):
+        respuestas += [str(i * 10), f"NP-{coditem}"]
+    return respuestas + ["Sí", "OC123", "GUIA1", "ASN1", "ZPL"]
+
+
+def respuestas_codelco(df_wms, semilla=0):
+    """
+    Respuestas de un pedido Codelco sin pallets: Material y Pos de cada CodItem,
+    peso y caja de cada LPN y la guía al final.
+    """
+    respuestas = []
+    for i, _ in enumerate(df_wms["CodItem"].drop_duplicates(), 1):
+        respuestas += ["", "s", str(i * 10)]
+    return respuestas + ["n", "n"] + _pesos_y_cajas(df_wms, semilla) + ["s"]
+
+
+def respuestas_importacion():
+    return ["OS123"]
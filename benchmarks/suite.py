@@ -0,0 +1,260 @@
+# benchmarks/suite.py
+"""
+Suite de benchmarks con pedidos sintéticos: cada cliente completo (con sus
+preguntas respondidas por utils.respuestas) y las funciones más usadas.
+Los resultados se guardan en JSON para comparar versiones.
+Uso: python -m benchmarks.suite [--tamanos 1000 10000] [--escenarios agrupar_cajas cliente_codelco]
+                                [--salida resultados.json] [--comparar resultados_anteriores.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+
+import pandas as pd
+
+import main as app
+import utils.cajas
+import utils.coditem_utils
+from benchmarks import sinteticos
+from utils.coditem_utils import guardar_coditems, indice_material, obtener_coditems
+from utils.comunes import agrupar_cajas
+from utils.plantillas import escribir_plantilla
+from utils.registro_clientes import cargar_cliente
+from utils.rutas import VARIABLE_SALIDA
+from utils.salidas import guardar_excel, motor_excel
+from utils.telemetria import VARIABLE_TELEMETRIA
+
+TAMANOS = [1_000, 10_000, 100_000, 1_000_000]
+RESULTADOS_DIR = os.path.join("benchmarks", "resultados")
+PLANTILLA_TOTTUS = os.path.join("output", "JAL", "importar tottus.xlsx")
+# Razón de tiempo sobre la corrida anterior que se marca como regresión
+UMBRAL_REGRESION = 1.25
+
+
+@contextmanager
+def entorno_aislado():
+    """
+    Carpeta temporal para los resultados, el historial de cajas, la base de
+    CodItem y la telemetría, de modo que el benchmark no toque output/ ni data/.
+    El JSON de CodItem apunta a un archivo que no existe: las bases nuevas no
+    importan data/coditem_db.json la primera vez que se abren.
+    Se desactivan las pausas y limpiezas de pantalla de los clientes.
+    """
+    carpeta = tempfile.mkdtemp(prefix="upperapp_bench_")
+    anteriores = (
+        os.environ.get(VARIABLE_SALIDA),
+        os.environ.get(VARIABLE_TELEMETRIA),
+        utils.cajas.HISTORIAL_CAJAS_FILE,
+        utils.coditem_utils.CODITEM_SQLITE_PATH,
+        utils.coditem_utils.CODITEM_DB_PATH,
+        os.system,
+        time.sleep,
+    )
+    os.environ[VARIABLE_SALIDA] = carpeta
+    os.environ[VARIABLE_TELEMETRIA] = os.path.join(carpeta, "telemetria.jsonl")
+    utils.cajas.HISTORIAL_CAJAS_FILE = os.path.join(carpeta, "historial_cajas.json")
+    utils.coditem_utils.CODITEM_DB_PATH = os.path.join(carpeta, "sin_coditem_db.json")
+    os.system = lambda comando: 0
+    time.sleep = lambda segundos: None
+    try:
+        yield carpeta
+    finally:
+        salida, telemetria, historial, sqlite, coditem_json, os.system, time.sleep = anteriores
+        for variable, valor in ((VARIABLE_SALIDA, salida), (VARIABLE_TELEMETRIA, telemetria)):
+            if valor is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = valor
+        utils.cajas.HISTORIAL_CAJAS_FILE = historial
+        utils.coditem_utils.CODITEM_SQLITE_PATH = sqlite
+        utils.coditem_utils.CODITEM_DB_PATH = coditem_json
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def base_coditems_nueva(carpeta, nombre):
+    # Cada escenario parte con una base vacía: los CodItem sintéticos no están guardados
+    utils.coditem_utils.CODITEM_SQLITE_PATH = os.path.join(carpeta, f"coditem_{nombre}.sqlite")
+
+
+def ejecutar_cliente(carpeta, owner, cliente, df, respuestas):
+    """
+    Corre un cliente completo como `main.py run`: lee el CSV, responde las
+    preguntas y escribe los archivos de salida.
+    """
+    wms = sinteticos.escribir_csv(df, os.path.join(carpeta, f"{cliente}.csv"))
+    path_respuestas = os.path.join(carpeta, f"{cliente}_respuestas.json")
+    with open(path_respuestas, "w", encoding="utf-8") as f:
+        json.dump(respuestas, f)
+    with open(os.devnull, "w", encoding="utf-8") as nulo, redirect_stdout(nulo):
+        inicio = time.perf_counter()
+        codigo = app.ejecutar_headless(owner, cliente, wms, path_respuestas)
+        segundos = time.perf_counter() - inicio
+    if codigo != 0:
+        raise RuntimeError(f"El cliente {cliente} terminó con código {codigo}")
+    return segundos
+
+
+def escenario_cliente_collahuasi(filas, carpeta):
+    df = sinteticos.generar_wms(filas)
+    base_coditems_nueva(carpeta, f"collahuasi_{filas}")
+    respuestas = sinteticos.respuestas_collahuasi(df)
+    return ejecutar_cliente(carpeta, "GSP", "Collahuasi", df, respuestas), {"lpns": df["LPN"].nunique()}
+
+
+def escenario_cliente_codelco(filas, carpeta):
+    df = sinteticos.generar_wms(filas)
+    base_coditems_nueva(carpeta, f"codelco_{filas}")
+    respuestas = sinteticos.respuestas_codelco(df)
+    return ejecutar_cliente(carpeta, "GSP", "Codelco", df, respuestas), {"lpns": df["LPN"].nunique()}
+
+
+def escenario_cliente_tottus(filas, carpeta):
+    df = sinteticos.generar_oc(filas)
+    return ejecutar_cliente(carpeta, "JAL", "Tottus", df, sinteticos.respuestas_importacion()), {}
+
+
+def escenario_agrupar_cajas(filas, carpeta):
+    bultos = sinteticos.generar_bultos(sinteticos.generar_wms(filas))
+    inicio = time.perf_counter()
+    grupos = agrupar_cajas(bultos)
+    return time.perf_counter() - inicio, {"bultos": len(bultos), "grupos": len(grupos)}
+
+
+def escenario_etiquetas_despacho(filas, carpeta):
+    collahuasi = cargar_cliente("Collahuasi")
+    df = sinteticos.generar_wms(filas)
+    df["LPN"] = df["LPN"].astype("category")
+    bultos = sinteticos.generar_bultos(df)
+    coditem_db = sinteticos.generar_coditem_db(df)
+    inicio = time.perf_counter()
+    etiquetas = collahuasi.generar_etiquetas_despacho(df, bultos, coditem_db, "OC123", pd.DataFrame())
+    return time.perf_counter() - inicio, {"etiquetas": len(etiquetas)}
+
+
+def escenario_excel_etiquetas(filas, carpeta):
+    """
+    Guardado de la hoja de etiquetas de Collahuasi (una fila por unidad despachada).
+    """
+    collahuasi = cargar_cliente("Collahuasi")
+    df = sinteticos.generar_wms(filas)
+    etiquetas = collahuasi.generar_etiquetas_despacho(
+        df, sinteticos.generar_bultos(df), sinteticos.generar_coditem_db(df), "OC123", pd.DataFrame()
+    )
+    inicio = time.perf_counter()
+    guardar_excel(os.path.join(carpeta, "etiquetas_peq.xlsx"), {"etiqueta_peq": etiquetas})
+    return time.perf_counter() - inicio, {"etiquetas": len(etiquetas), "motor": motor_excel()}
+
+
+def escenario_plantilla_importacion(filas, carpeta):
+    df = sinteticos.generar_oc(filas).rename(columns={"Número OC": "NroOrdenCliente", "SKU": "SKU Item"})
+    inicio = time.perf_counter()
+    escribir_plantilla(PLANTILLA_TOTTUS, os.path.join(carpeta, "importar.xlsx"), df)
+    return time.perf_counter() - inicio, {}
+
+
+def escenario_coditems(filas, carpeta):
+    """
+    Guardado y consulta de la base de CodItem con un pedido de filas filas.
+    """
+    base_coditems_nueva(carpeta, f"consulta_{filas}")
+    db = sinteticos.generar_coditem_db(sinteticos.generar_wms(filas))
+    coditems = list(db)
+    materiales = [info["Material"] for info in db.values()]
+    inicio = time.perf_counter()
+    guardar_coditems(db)
+    guardado = time.perf_counter() - inicio
+    encontrados = obtener_coditems(coditems)
+    indice = indice_material(materiales)
+    segundos = time.perf_counter() - inicio
+    return segundos, {"coditems": len(db), "guardado": round(guardado, 4),
+                      "encontrados": len(encontrados), "materiales": len(indice)}
+
+
+# Escenario -> (función(filas, carpeta) -> (segundos, datos extra), máximo de filas por defecto).
+# Los clientes preguntan por cada LPN y CodItem, así que por defecto se corren con pedidos
+# más chicos; --todos los corre con todos los tamaños.
+ESCENARIOS = {
+    "cliente_collahuasi": (escenario_cliente_collahuasi, 10_000),
+    "cliente_codelco": (escenario_cliente_codelco, 10_000),
+    "cliente_tottus": (escenario_cliente_tottus, 100_000),
+    "agrupar_cajas": (escenario_agrupar_cajas, 1_000_000),
+    "etiquetas_despacho": (escenario_etiquetas_despacho, 1_000_000),
+    # Cada fila del WMS da en promedio unas 20 etiquetas
+    "excel_etiquetas": (escenario_excel_etiquetas, 10_000),
+    "plantilla_importacion": (escenario_plantilla_importacion, 1_000_000),
+    "coditems": (escenario_coditems, 1_000_000),
+}
+
+
+def correr(escenarios, tamanos, todos_los_tamanos=False):
+    resultados = []
+    with entorno_aislado() as carpeta:
+        for nombre in escenarios:
+            funcion, maximo = ESCENARIOS[nombre]
+            for filas in tamanos:
+                if filas > maximo and not todos_los_tamanos:
+                    continue
+                segundos, extra = funcion(filas, carpeta)
+                print(f"{nombre:<24} {filas:>10} {segundos:>10.3f}")
+                resultados.append({"escenario": nombre, "filas": filas, "segundos": round(segundos, 4), **extra})
+    return resultados
+
+
+def comparar(resultados, path_anterior, umbral=UMBRAL_REGRESION):
+    """
+    Compara con los resultados de otra corrida.
+    :return: cantidad de regresiones (más lento que umbral veces)
+    """
+    with open(path_anterior, "r", encoding="utf-8") as f:
+        anteriores = {(r["escenario"], r["filas"]): r["segundos"] for r in json.load(f)["resultados"]}
+    regresiones = 0
+    print(f"\n{'Escenario':<24} {'Filas':>10} {'Antes':>10} {'Ahora':>10} {'Razón':>7}")
+    for r in resultados:
+        antes = anteriores.get((r["escenario"], r["filas"]))
+        if not antes:
+            continue
+        razon = r["segundos"] / antes
+        marca = " ⚠️" if razon > umbral else ""
+        regresiones += razon > umbral
+        print(f"{r['escenario']:<24} {r['filas']:>10} {antes:>10.3f} {r['segundos']:>10.3f} {razon:>7.2f}{marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de UpperApp con pedidos sintéticos")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS, help="Filas de los pedidos")
+    parser.add_argument("--escenarios", nargs="+", choices=list(ESCENARIOS), default=list(ESCENARIOS))
+    parser.add_argument("--todos", action="store_true", help="Correr los clientes también con los tamaños más grandes")
+    parser.add_argument("--salida", help="JSON de resultados (por defecto benchmarks/resultados/suite_<fecha>.json)")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION)
+    args = parser.parse_args()
+
+    print(f"{'Escenario':<24} {'Filas':>10} {'Segundos':>10}")
+    resultados = correr(args.escenarios, sorted(args.tamanos), args.todos)
+
+    salida = args.salida or os.path.join(RESULTADOS_DIR, f"suite_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump({
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "plataforma": platform.platform(),
+            "resultados": resultados,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultados en {salida}")
+
+    if args.comparar and comparar(resultados, args.comparar, args.umbral):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
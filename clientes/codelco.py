@@ -1,34 +1,63 @@
 # clientes/codelco.py
-import json
 import os
-import re
+import numpy as np
 import pandas as pd
 import time
 import questionary
-from utils.coditem_utils import validar_o_actualizar_material
+from utils.balanza import leer_peso
+from utils.cajas import (
+    actualizar_historial_cajas,
+    cargar_historial_cajas,
+    elecciones_de_bultos,
+    matriz_cajas,
+    recomendar_caja,
+    registrar_eleccion_caja,
+    volumen_caja,
+)
+from utils.coditem_utils import (
+    guardar_coditems,
+    indice_material,
+    obtener_coditems,
+    validar_o_actualizar_material,
+)
+from utils.comunes import contenido_lpn, descartar_filas_sin_lpn, filas_de_lpns, indexar_lpns
+from utils.escaneo import escanear_lpns, escanear_pallet
+from utils.paletizado import imprimir_propuesta, proponer_pallets
+from utils.rutas import ruta_salida
+from utils.salidas import guardar_excel
+from utils.sesion import abrir_sesion, cerrar_sesion, registrar
+from utils.telemetria import etapa
+
+# Columnas del WMS que usa el proceso; el resto del archivo no se carga
+COLUMNAS_WMS = {
+    "LPN": "category",
+    "CodItem": "category",
+    "NomItem": "str",
+    "Unidades": None,
+}
 
 def run(df_wms, df_cajas):
     """
     Proceso para cliente Codelco.
     Recibe df_wms y df_cajas, interactúa con usuario para ingresar pesos, seleccionar cajas,
     asignar posiciones y materiales, luego genera archivos Excel con resultados.
+    Las respuestas se guardan en un diario de sesión para retomar un pedido interrumpido.
     """
     print("🟩 Iniciando proceso CODELCO...\n")
 
-    # Cargar base coditem_db una sola vez para usar en todo el proceso
-    coditem_db_path = "data/coditem_db.json"
-    if os.path.exists(coditem_db_path):
-        with open(coditem_db_path, "r", encoding="utf-8") as f:
-            coditem_db = json.load(f)
-    else:
-        coditem_db = {}
+    df_wms = descartar_filas_sin_lpn(df_wms)
+    sesion = abrir_sesion("codelco", df_wms)
+    estado = sesion["estado"]
 
-    # Obtener CodItems únicos de la OC
+    # Obtener CodItems únicos de la OC y sus datos guardados en una sola consulta
     coditems_unicos = df_wms["CodItem"].astype(str).unique().tolist()
-    pos_material_por_coditem = {}
+    coditem_db = obtener_coditems(coditems_unicos)
+    pos_material_por_coditem = estado["pos_material"]
 
     # Preguntar posición y material solo una vez por CodItem
     for coditem in coditems_unicos:
+        if coditem in pos_material_por_coditem:
+            continue
         os.system('cls')
         nomitem = coditem_db.get(coditem, {}).get("NomItem", "")
         material_existente = coditem_db.get(coditem, {}).get("Material", "")
@@ -48,41 +77,65 @@ def run(df_wms, df_cajas):
                     break
 
         pos = input(f"Ingrese Posición (Pos) para CodItem {coditem}: ").strip()
-        pos_material_por_coditem[coditem] = {"Pos": pos, "Material": material}
+        registrar(sesion, "pos_material", CodItem=coditem, Pos=pos, Material=material)
 
-    lleva_pallets = input("¿El pedido lleva pallets? (s/n): ").strip().lower()
+    # Con pistola de código de barras los LPN se registran en el orden en que se escanean
+    escaneo = input("¿Registrar LPN escaneando códigos? (s/n): ").strip().lower() == "s"
 
-    # Cargar base coditem_db una sola vez para usar en todo el proceso
-    coditem_db_path = "data/coditem_db.json"
-    if os.path.exists(coditem_db_path):
-        with open(coditem_db_path, "r", encoding="utf-8") as f:
-            coditem_db = json.load(f)
-    else:
-        coditem_db = {}
+    if estado["lleva_pallets"] is None:
+        registrar(sesion, "lleva_pallets", valor=input("¿El pedido lleva pallets? (s/n): ").strip().lower())
+    lleva_pallets = estado["lleva_pallets"]
 
-    pallets = []
-    remaining_lpns = df_wms["LPN"].drop_duplicates().tolist()
+    todos_lpns = df_wms["LPN"].drop_duplicates().tolist()
+    indice_lpn = indexar_lpns(df_wms)
+    en_pallet = {lpn for p in estado["pallets"] for lpn in p["LPNs"]}
+    remaining_lpns = [lpn for lpn in todos_lpns if lpn not in en_pallet]
 
-    if lleva_pallets == "s":
-        pallet_num = 1
+    if lleva_pallets == "s" and not estado["pallets_listos"]:
+        # Al retomar una sesión con pallets ya armados se pregunta primero si hay más
+        preguntar_mas = bool(estado["pallets"])
+        propuesta, aceptada = proponer_pallets_automaticos(df_wms, indice_lpn, remaining_lpns, df_cajas)
         while remaining_lpns:
+            # Los pallets propuestos se arman seguidos, sin preguntar si hay más
+            sugeridos = []
+            pendientes = set(remaining_lpns)
+            while propuesta and not sugeridos:
+                sugeridos = [lpn for lpn in propuesta[0]["LPNs"] if lpn in pendientes]
+                if not sugeridos:
+                    propuesta.pop(0)
+
+            if preguntar_mas and not sugeridos and input("¿Más pallets? (s/n): ").strip().lower() != "s":
+                break
+            preguntar_mas = False
+
+            pallet_num = len(estado["pallets"]) + 1
             os.system('cls')  # Limpiar consola antes de pedir selección de LPNs para pallet
             print(f"\n📦 Selección de LPNs para Pallet {pallet_num}:")
 
-            # Usar questionary checkbox para selección múltiple
-            selected_lpns = questionary.checkbox(
-                "Selecciona los LPNs para este pallet:",
-                choices=remaining_lpns
-            ).ask()
+            if sugeridos and aceptada:
+                print(f"   {len(sugeridos)} LPNs de la propuesta: {' '.join(sugeridos)}")
+                selected_lpns = sugeridos
+            elif escaneo and not sugeridos:
+                selected_lpns = escanear_pallet(remaining_lpns)
+                if selected_lpns is None:
+                    print("Proceso cancelado por usuario. El avance queda guardado para retomarlo.")
+                    return
+            else:
+                # Usar questionary checkbox para selección múltiple, con la propuesta marcada
+                marcados = set(sugeridos)
+                selected_lpns = questionary.checkbox(
+                    "Selecciona los LPNs para este pallet:",
+                    choices=[questionary.Choice(lpn, checked=lpn in marcados) for lpn in remaining_lpns]
+                ).ask()
 
             if not selected_lpns:
                 print("❌ Debes seleccionar al menos un LPN.")
                 continue
 
             # --- Pedir peso y dimensiones solo una vez por pallet ---
+            peso = leer_peso(f"⚖️ Peso total del Pallet {pallet_num} (kg): ")
             while True:
                 try:
-                    peso = float(input(f"⚖️ Peso total del Pallet {pallet_num} (kg): "))
                     alto = float(input(f"📏 Altura del Pallet {pallet_num} (cm): "))
                     largo = float(input(f"📏 Longitud del Pallet {pallet_num} (cm): "))
                     ancho = float(input(f"📏 Ancho del Pallet {pallet_num} (cm): "))
@@ -90,112 +143,70 @@ def run(df_wms, df_cajas):
                 except ValueError:
                     print("❌ Ingresa valores válidos.")
 
-            # Para cada LPN seleccionado, pedir Pos y Material para cada item dentro
-            posiciones_list_pallet = []
-            bulto_num_pallet = 1  # Contador local para bultos dentro del pallet
             for lpn in selected_lpns:
-                grupo = df_wms[df_wms["LPN"] == lpn]
-                print(f"\n📦 Procesando LPN {lpn} dentro de Pallet {pallet_num} con {len(grupo)} items")
-
-                for idx, row in grupo.iterrows():
-                    coditem = str(row["CodItem"])
-                    # Usar la info ya pedida al inicio
-                    pos = pos_material_por_coditem[coditem]["Pos"]
-                    material = pos_material_por_coditem[coditem]["Material"]
-
-                    posiciones_list_pallet.append({
-                        "Pos": pos,
-                        "Material": material,
-                        "Cantidad": row["Unidades"],
-                        "Unidad": "UN",
-                        "Bulto": bulto_num_pallet
-                    })
-
-                bulto_num_pallet += 1
-
-            pallets.append({
+                print(f"\n📦 Procesando LPN {lpn} dentro de Pallet {pallet_num} con {len(indice_lpn[lpn])} items")
+
+            registrar(sesion, "pallet", pallet={
                 "Pallet": f"Pallet{pallet_num}",
                 "LPNs": selected_lpns,
                 "Peso (kg)": peso,
                 "Alto (cm)": alto,
                 "Largo (cm)": largo,
-                "Ancho (cm)": ancho,
-                "Posiciones": posiciones_list_pallet  # Guardar posiciones para luego agregar
+                "Ancho (cm)": ancho
             })
 
             # Actualizar remaining_lpns removiendo los seleccionados
-            remaining_lpns = [lpn for lpn in remaining_lpns if lpn not in selected_lpns]
-
-            if not remaining_lpns or input("¿Más pallets? (s/n): ").strip().lower() != "s":
-                break
+            seleccionados = set(selected_lpns)
+            remaining_lpns = [lpn for lpn in remaining_lpns if lpn not in seleccionados]
+            preguntar_mas = True
+            if sugeridos:
+                propuesta.pop(0)
+    if not estado["pallets_listos"]:
+        registrar(sesion, "pallets_listos")
 
-            pallet_num += 1
+    pallets = estado["pallets"]
 
     # Procesar LPNs restantes (o todos si no hay pallets)
-    lpns_a_procesar = remaining_lpns if lleva_pallets == "s" else df_wms["LPN"].tolist()
-    df_filtrado = df_wms[df_wms["LPN"].isin(lpns_a_procesar)]
-
-    # Variables para bultos y posiciones
-    pesos, altos, largos, anchos, nombre_caja, lpn_list = [], [], [], [], [], []
-    posiciones_list = []
-
-    bulto_num = 1
-
-    # Procesar cada LPN como un bulto (solo los que no están en pallets)
-    for lpn in lpns_a_procesar:
-        grupo = df_filtrado[df_filtrado["LPN"] == lpn]
-        print(f"\n📦 Procesando LPN: {lpn} con {len(grupo)} items")
-
-        while True:
-            try:
-                peso = float(input(f"⚖️ Peso real (kg) para LPN {lpn}: "))
-                break
-            except ValueError:
-                print("❌ Ingresa un número válido.")
-
-        # Limpiar consola antes de seleccionar caja para mejor experiencia
-        os.system('cls')
-        print("\n📦 Tipos de caja:")
-        for i, caja in df_cajas.iterrows():
-            print(f"{i}. {caja['NombreCaja']} - {caja['Alto(cm)']}x{caja['Largo(cm)']}x{caja['Ancho(cm)']}")
-
-        while True:
-            try:
-                opcion = int(input("Selecciona el número de caja: "))
-                caja_sel = df_cajas.iloc[opcion]
-                break
-            except (ValueError, IndexError):
-                print("❌ Selección inválida.")
-
-        pesos.append(peso)
-        altos.append(caja_sel["Alto(cm)"])
-        largos.append(caja_sel["Largo(cm)"])
-        anchos.append(caja_sel["Ancho(cm)"])
-        nombre_caja.append(caja_sel["NombreCaja"])
-        lpn_list.append(lpn)
-
-        for idx, row in grupo.iterrows():
-            coditem = str(row["CodItem"])
-            unidades = row["Unidades"]
-
-            pos = pos_material_por_coditem[coditem]["Pos"]
-            material = pos_material_por_coditem[coditem]["Material"]
-
-            posiciones_list.append({
-                "Pos": pos,
-                "Material": material,
-                "Cantidad": unidades,
-                "Unidad": "UN",
-                "Bulto": bulto_num
-            })
-
-        bulto_num += 1
-
-    # Agregar posiciones de pallets a posiciones_list y bultos de pallets a df_bultos
+    lpns_a_procesar = remaining_lpns if lleva_pallets == "s" else todos_lpns
+    bultos = estado["bultos"]
+    historial = cargar_historial_cajas()
+    matriz = matriz_cajas(df_cajas)
+
+    # Procesar cada LPN como un bulto (solo los que no están en pallets ni en la sesión guardada)
+    with etapa("registro_bultos", filas=len(lpns_a_procesar)):
+        if escaneo:
+            def procesar(lpn):
+                return registrar_bulto(df_wms, df_cajas, indice_lpn, lpn, sesion, historial, matriz)
+
+            if escanear_lpns(lpns_a_procesar, set(bultos), procesar) is None:
+                print("Proceso cancelado por usuario. El avance queda guardado para retomarlo.")
+                return
+            # Los bultos se numeran en el orden en que se escanearon
+            pendientes = set(lpns_a_procesar)
+            lpns_a_procesar = [lpn for lpn in bultos if lpn in pendientes]
+        else:
+            for lpn in lpns_a_procesar:
+                if lpn not in bultos:
+                    registrar_bulto(df_wms, df_cajas, indice_lpn, lpn, sesion, historial, matriz)
+
+    # Variables para bultos
+    pesos = [bultos[lpn]["Peso (kg)"] for lpn in lpns_a_procesar]
+    altos = [bultos[lpn]["Alto (cm)"] for lpn in lpns_a_procesar]
+    largos = [bultos[lpn]["Largo (cm)"] for lpn in lpns_a_procesar]
+    anchos = [bultos[lpn]["Ancho (cm)"] for lpn in lpns_a_procesar]
+    nombre_caja = [bultos[lpn]["TipoCaja"] for lpn in lpns_a_procesar]
+    lpn_list = list(lpns_a_procesar)
+
+    # Posiciones de los bultos (numerados en el orden procesado) y luego las de cada pallet;
+    # los bultos se numeran desde 1 dentro de cada pallet
+    with etapa("posiciones", filas=len(df_wms)):
+        posiciones = [construir_posiciones(df_wms, indice_lpn, lpns_a_procesar, pos_material_por_coditem)]
+        posiciones.extend(
+            construir_posiciones(df_wms, indice_lpn, p["LPNs"], pos_material_por_coditem) for p in pallets
+        )
+
+    # Agregar bultos de pallets a df_bultos
     for p in pallets:
-        # Agregar posiciones
-        posiciones_list.extend(p["Posiciones"])
-
         # Agregar bultos de pallet al df_bultos
         for i, lpn in enumerate(p["LPNs"], start=1):
             pesos.append(p["Peso (kg)"] / len(p["LPNs"]))  # Distribuir peso entre LPNs
@@ -218,60 +229,169 @@ def run(df_wms, df_cajas):
     df_bultos["Unidad_3"] = "M"
 
     # Crear DataFrame posiciones
-    df_posiciones = pd.DataFrame(posiciones_list)
+    df_posiciones = pd.concat(posiciones, ignore_index=True)
 
     if "Material" not in df_posiciones.columns or df_posiciones.empty:
         print("❌ No hay datos de posiciones con columna 'Material' para generar la guía.")
         return  # O manejar según convenga
 
     # Guardar archivos Excel
-    with pd.ExcelWriter("output/bultos_codelco.xlsx") as writer:
-        df_bultos.to_excel(writer, sheet_name="Bultos", index=False)
-    df_posiciones.to_excel("output/posiciones_codelco.xlsx", index=False)
+    with etapa("excel", filas=len(df_bultos) + len(df_posiciones)):
+        guardar_excel(ruta_salida("bultos_codelco.xlsx"), {"Bultos": df_bultos})
+        guardar_excel(ruta_salida("posiciones_codelco.xlsx"), {"Sheet1": df_posiciones})
 
     print("\n✅ Archivos generados: bultos_codelco.xlsx y posiciones_codelco.xlsx")
+    cerrar_sesion(sesion)
+    actualizar_historial_cajas(elecciones_de_bultos(df_wms, indice_lpn, lpns_a_procesar, bultos))
     time.sleep(1)
     os.system('cls')    
 
     # Impresión de guía
     respuesta = input("\n¿Desea imprimir el detalle para la creación de guía? (s/n): ").strip().lower()
     if respuesta == "s":
-        # print(coditem_db)
-        resumen = df_posiciones.groupby("Material").agg({"Cantidad": "sum"}).reset_index()
-
+        with etapa("guia", filas=len(df_posiciones)):
+            guia = construir_guia(df_posiciones)
         print("\nGuía de Bultos:")
         print(f"{'CodItem':<12} {'NomItem':<50} {'Cantidad':>8} {'Unidad':>6}")
         print("-" * 80)
-        for _, r in resumen.iterrows():
-            material = str(r["Material"])
-            cantidad = r["Cantidad"]
-            nomitem = r.get("NomItem", "")
-
-            # Obtener nombre desde coditem_db usando material como clave
-            if material in coditem_db:
-                nomitem = coditem_db[material].get("NomItem", "")
-            else:
-                # Buscar en valores si no está como clave
-                for v in coditem_db.values():
-                    if str(v.get("Material", "")) == material:
-                        nomitem = v.get("NomItem", "")
-                        break
-
-            print(f"{coditem:<12} {nomitem:<50} {cantidad:>8} UN")
+        for r in guia.itertuples(index=False):
+            print(f"{r.CodItem:<12} {r.NomItem:<50} {r.Cantidad:>8} {r.Unidad}")
 
         # Mostrar LPNs únicos en la guía, limpiando prefijo SAL0000...
-        def limpiar_lpn(lpn):
-            if lpn.upper().startswith("SAL"):
-                m = re.match(r"(SAL)0*(\d+)", lpn.upper())
-                if m:
-                    return f"{m.group(1)}{m.group(2)}"
-            return lpn
-
-        lpns_usados = list(set(lpn_list))  # Unicos
-        lpns_limpios = [limpiar_lpn(lpn) for lpn in lpns_usados]
+        lpns_limpios = limpiar_lpns(pd.Series(lpn_list).drop_duplicates())
         print("\nLPNs en la guía:")
         print(" ".join(lpns_limpios))
 
+
+def registrar_bulto(df_wms, df_cajas, indice_lpn, lpn, sesion, historial, matriz):
+    """
+    Pide peso y tipo de caja de un LPN y lo guarda en la sesión. Con
+    recomendación, Enter sin número acepta la caja recomendada.
+    :return: True cuando el LPN queda registrado
+    """
+    print(f"\n📦 Procesando LPN: {lpn} con {len(indice_lpn[lpn])} items")
+
+    peso = leer_peso(f"⚖️ Peso real (kg) para LPN {lpn}: ")
+
+    coditems, unidades = contenido_lpn(df_wms, indice_lpn, lpn)
+    recomendada = recomendar_caja(df_cajas, matriz, coditems, unidades, historial)
+
+    # Limpiar consola antes de seleccionar caja para mejor experiencia
+    os.system('cls')
+    print("\n📦 Tipos de caja:")
+    for i, caja in df_cajas.iterrows():
+        marca = " ⭐ recomendada" if i == recomendada else ""
+        print(f"{i}. {caja['NombreCaja']} - {caja['Alto(cm)']}x{caja['Largo(cm)']}x{caja['Ancho(cm)']}{marca}")
+
+    mensaje_caja = "Selecciona el número de caja: " if recomendada is None else f"Selecciona el número de caja [{recomendada}]: "
+    while True:
+        try:
+            opcion = input(mensaje_caja).strip()
+            if not opcion and recomendada is not None:
+                opcion = recomendada
+            caja_sel = df_cajas.iloc[int(opcion)]
+            break
+        except (ValueError, IndexError):
+            print("❌ Selección inválida.")
+
+    registrar(sesion, "bulto", LPN=lpn, bulto={
+        "Peso (kg)": peso,
+        "CódigoCaja": caja_sel["CódigoCaja"],
+        "TipoCaja": caja_sel["NombreCaja"],
+        "Alto (cm)": caja_sel["Alto(cm)"],
+        "Largo (cm)": caja_sel["Largo(cm)"],
+        "Ancho (cm)": caja_sel["Ancho(cm)"],
+    })
+    # Los LPN siguientes del pedido ya aprovechan esta elección
+    registrar_eleccion_caja(
+        historial, coditems, unidades, caja_sel["CódigoCaja"], volumen_caja(caja_sel), peso
+    )
+    return True
+
+
+@etapa("propuesta_pallets")
+def proponer_pallets_automaticos(df_wms, indice_lpn, lpns, df_cajas):
+    """
+    Ofrece armar los pallets automáticamente. Si el operador acepta la
+    propuesta devuelve (propuesta, True); si quiere ajustarla, (propuesta, False)
+    para mostrarla preseleccionada; si arma a mano, ([], False).
+    """
+    if input("¿Armar pallets automáticamente? (s/n): ").strip().lower() != "s":
+        return [], False
+
+    while True:
+        try:
+            peso_max = float(input("⚖️ Peso máximo por pallet (kg): "))
+            alto_max = float(input("📏 Altura máxima de carga por pallet (cm): "))
+        except ValueError:
+            print("❌ Ingresa valores válidos.")
+            continue
+        if peso_max > 0 and alto_max > 0:
+            break
+        print("❌ El peso y la altura máximos deben ser mayores que 0.")
+
+    propuesta, sin_pallet = proponer_pallets(df_wms, indice_lpn, lpns, df_cajas, peso_max, alto_max)
+    imprimir_propuesta(propuesta, sin_pallet)
+
+    accion = input("¿Aceptar la propuesta? (s = aceptar, a = ajustar, n = armar a mano): ").strip().lower()
+    if accion == "s":
+        return propuesta, True
+    if accion == "a":
+        return propuesta, False
+    return [], False
+
+
+def construir_posiciones(df_wms, indice_lpn, lpns, pos_material_por_coditem):
+    """
+    Arma las posiciones de un grupo de LPN: una fila por item del WMS, con la
+    Pos y Material de su CodItem y el número de bulto según el orden de lpns.
+    :return: DataFrame con columnas Pos, Material, Cantidad, Unidad, Bulto
+    """
+    filas = filas_de_lpns(df_wms, indice_lpn, lpns)
+    coditems = filas["CodItem"].astype(str)
+    tamanos = [len(indice_lpn[lpn]) for lpn in lpns]
+    return pd.DataFrame({
+        "Pos": coditems.map({c: v["Pos"] for c, v in pos_material_por_coditem.items()}).to_numpy(),
+        "Material": coditems.map({c: v["Material"] for c, v in pos_material_por_coditem.items()}).to_numpy(),
+        "Cantidad": filas["Unidades"].to_numpy(),
+        "Unidad": "UN",
+        "Bulto": np.repeat(np.arange(1, len(lpns) + 1), tamanos),
+    })
+
+
+def construir_guia(df_posiciones):
+    """
+    Arma el detalle para la creación de guía: Cantidad total por Material con
+    el CodItem y NomItem que le corresponden en la base.
+    :param df_posiciones: DataFrame con columnas Material y Cantidad
+    :return: DataFrame con columnas CodItem, NomItem, Material, Cantidad, Unidad
+    """
+    resumen = df_posiciones.groupby("Material", as_index=False)["Cantidad"].sum()
+    resumen["Material"] = resumen["Material"].astype(str)
+
+    indice = indice_material(resumen["Material"].tolist())
+    df_indice = pd.DataFrame(
+        [(material, coditem, nomitem) for material, (coditem, nomitem) in indice.items()],
+        columns=["Material", "CodItem", "NomItem"],
+    )
+    guia = resumen.merge(df_indice, on="Material", how="left")
+    guia[["CodItem", "NomItem"]] = guia[["CodItem", "NomItem"]].fillna("")
+    guia["Unidad"] = "UN"
+    return guia[["CodItem", "NomItem", "Material", "Cantidad", "Unidad"]]
+
+
+def limpiar_lpns(lpns):
+    """
+    Acorta los LPN con prefijo SAL quitando los ceros (SAL0000004478 -> SAL4478).
+    Los LPN con otro formato quedan igual.
+    :param lpns: Series de LPN
+    :return: Series de LPN limpios
+    """
+    lpns = lpns.astype(str)
+    partes = lpns.str.upper().str.extract(r"^(SAL)0*(\d+)")
+    return (partes[0] + partes[1]).fillna(lpns)
+
+
 def pedir_pos_y_material(coditems_unicos, coditem_db):
     pos_material_por_coditem = {}
     for coditem in coditems_unicos:
@@ -284,29 +404,19 @@ def pedir_pos_y_material(coditems_unicos, coditem_db):
         pos_material_por_coditem[coditem] = {"Pos": pos, "Material": material}
     return pos_material_por_coditem
 
-def actualizar_coditem_db(df_wms, coditem_db_path="data/coditem_db.json"):
+def actualizar_coditem_db(df_wms):
     """
-    Actualiza coditem_db.json con nuevos CodItem que aparecen en df_wms pero no están en la base.
+    Agrega a la base de CodItem los CodItem que aparecen en df_wms pero no están en la base.
     """
-    if os.path.exists(coditem_db_path):
-        with open(coditem_db_path, "r", encoding="utf-8") as f:
-            coditem_db = json.load(f)
-    else:
-        coditem_db = {}
+    coditems = df_wms["CodItem"].astype(str).unique()
+    coditem_db = obtener_coditems(coditems)
 
-    # Convert keys to str to avoid int64 keys causing JSON dump error
-    coditem_db = {str(k): v for k, v in coditem_db.items()}
-
-    nuevos_coditems = set(df_wms["CodItem"].astype(str).unique()) - set(coditem_db.keys())
+    nuevos_coditems = set(coditems) - set(coditem_db.keys())
     if nuevos_coditems:
         print(f"Se encontraron {len(nuevos_coditems)} nuevos CodItem. Se agregarán a la base.")
-        for coditem in nuevos_coditems:
-            # Obtener nomitem con la función corregida
-            nomitem = new_func(df_wms, coditem)
-            coditem_db[coditem] = {"NomItem": nomitem}
-
-        with open(coditem_db_path, "w", encoding="utf-8") as f:
-            json.dump(coditem_db, f, indent=2, ensure_ascii=False)
+        nuevos = {coditem: {"NomItem": new_func(df_wms, coditem)} for coditem in nuevos_coditems}
+        guardar_coditems(nuevos)
+        coditem_db.update(nuevos)
     else:
         print("No se encontraron nuevos CodItem.")
 
@@ -1,9 +1,41 @@
 # clientes/collahuasi.py
-import json
 import os
+import numpy as np
 import pandas as pd
 import questionary  # <-- Agregado import de questionary
-from utils.comunes import agrupar_cajas, agrupar_unidades_por_coditem
+from utils.balanza import leer_peso
+from utils.cajas import (
+    actualizar_historial_cajas,
+    cargar_historial_cajas,
+    elecciones_de_bultos,
+    matriz_cajas,
+    recomendar_caja,
+    registrar_eleccion_caja,
+    volumen_caja,
+)
+from utils.comunes import (
+    agrupar_cajas,
+    agrupar_unidades_por_coditem,
+    contenido_lpn,
+    descartar_filas_sin_lpn,
+    indexar_lpns,
+)
+from utils.coditem_utils import guardar_coditems, obtener_coditems
+from utils.escaneo import escanear_lpns, escanear_pallet
+from utils.paletizado import imprimir_propuesta, proponer_pallets
+from utils.rutas import ruta_salida
+from utils.salidas import guardar_excel
+from utils.sesion import abrir_sesion, cerrar_sesion, registrar
+from utils.telemetria import etapa
+from utils.zpl import ETIQUETA_GRANDE, ETIQUETA_PEQ, escribir_zpl
+
+# Columnas del WMS que usa el proceso; el resto del archivo no se carga
+COLUMNAS_WMS = {
+    "LPN": "category",
+    "CodItem": "category",
+    "NomItem": "str",
+    "Unidades": None,
+}
 
 
 def input_opcion(msg, opciones):
@@ -45,166 +77,337 @@ def input_no_espacios(msg):
             return val
 
 
-def run(df_wms, df_cajas):
+def seleccionar_caja(df_cajas, recomendada=None):
     """
-    Proceso para cliente Collahuasi.
-    Recibe df_wms y df_cajas, interactúa con usuario para definir pallets y cajas,
-    luego genera archivo Excel con resultados.
+    Muestra los tipos de caja y devuelve la fila elegida, "Volver" o None si se sale.
+    :param recomendada: posición de la caja que queda seleccionada por defecto
     """
-    print("\n🟦 Iniciando proceso Collahuasi...\n")
+    opciones_cajas = [
+        f"{i}. {row['NombreCaja']} - {row['Alto(cm)']}x{row['Largo(cm)']}x{row['Ancho(cm)']}"
+        for i, row in df_cajas.iterrows()
+    ]
+    default = None
+    if recomendada is not None:
+        opciones_cajas[recomendada] += " ⭐ recomendada"
+        default = opciones_cajas[recomendada]
+    opciones_cajas += ["Volver", "Salir"]
+    while True:
+        opcion = questionary.select(
+            "Selecciona el tipo de caja:",
+            choices=opciones_cajas,
+            default=default
+        ).ask()
+        if opcion is None or opcion == "Salir":
+            return None
+        if opcion == "Volver":
+            return "Volver"
+        try:
+            idx = int(opcion.split(".")[0])
+            if 0 <= idx < len(df_cajas):
+                return df_cajas.iloc[idx]
+        except Exception:
+            pass
+        print("❌ Selección inválida.")
 
-    remaining_lpns = df_wms["LPN"].tolist()
-    pallets = []
-    pallet_num = 1
 
-    # Usar questionary para opción sí/no
-    lleva_pallets = questionary.select(
-        "¿El pedido lleva pallets?",
-        choices=["Sí", "No", "Salir"]
+def proponer_pallets_automaticos(df_wms, indice_lpn, lpns, df_cajas):
+    """
+    Ofrece armar los pallets automáticamente. Si el operador acepta la
+    propuesta devuelve (propuesta, True); si quiere ajustarla, (propuesta, False)
+    para mostrarla preseleccionada; si arma a mano, ([], False).
+    """
+    modo = questionary.select(
+        "¿Cómo desea armar los pallets?",
+        choices=["Manual", "Automático"]
     ).ask()
+    if modo != "Automático":
+        return [], False
 
-    if lleva_pallets == "Salir" or lleva_pallets is None:
-        print("Proceso cancelado por usuario.")
-        return
-
-    if lleva_pallets == "Sí":
-        while remaining_lpns:
-            print(f"\n📦 Selección de LPNs para Pallet {pallet_num}:")
-            selected_lpns = questionary.checkbox(
-                "Selecciona los LPNs para este pallet:",
-                choices=remaining_lpns + ["Volver", "Salir"]
-            ).ask()
+    while True:
+        peso_max = input_numero("⚖️ Peso máximo por pallet (kg): ")
+        alto_max = input_numero("📏 Altura máxima de carga por pallet (cm): ")
+        if peso_max > 0 and alto_max > 0:
+            break
+        print("❌ El peso y la altura máximos deben ser mayores que 0.")
+    propuesta, sin_pallet = proponer_pallets(df_wms, indice_lpn, lpns, df_cajas, peso_max, alto_max)
+    imprimir_propuesta(propuesta, sin_pallet)
+
+    accion = questionary.select(
+        "¿Qué desea hacer con la propuesta?",
+        choices=["Aceptar", "Ajustar", "Armar a mano"]
+    ).ask()
+    if accion == "Aceptar":
+        return propuesta, True
+    if accion == "Ajustar":
+        return propuesta, False
+    return [], False
 
-            if selected_lpns is None or "Salir" in selected_lpns:
-                print("Proceso cancelado por usuario.")
-                return
-            if "Volver" in selected_lpns:
-                # Volver a preguntar si lleva pallets
-                lleva_pallets = questionary.select(
-                    "¿El pedido lleva pallets?",
-                    choices=["Sí", "No", "Salir"]
-                ).ask()
-                if lleva_pallets != "Sí":
-                    break
-                else:
-                    continue
-
-            if not selected_lpns:
-                print("❌ Debes seleccionar al menos un LPN.")
-                continue
-
-            peso = input_numero(f"⚖️ Peso total del Pallet {pallet_num} (kg): ")
-            alto = input_numero(f"📏 Altura del Pallet {pallet_num} (cm): ")
-            largo = input_numero(f"📏 Longitud del Pallet {pallet_num} (cm): ")
-            ancho = input_numero(f"📏 Ancho del Pallet {pallet_num} (cm): ")
-
-            pallets.append({
-                "Pallet": f"Pallet{pallet_num}",
-                "LPNs": selected_lpns,
-                "Peso (kg)": peso,
-                "Alto (cm)": alto,
-                "Largo (cm)": largo,
-                "Ancho (cm)": ancho
-            })
-
-            remaining_lpns = [lpn for lpn in remaining_lpns if lpn not in selected_lpns]
-
-            if not remaining_lpns:
-                break
 
+@etapa("pallets")
+def definir_pallets(df_wms, df_cajas, indice_lpn, lpns, sesion, escaneo=False):
+    """
+    Pregunta si el pedido lleva pallets y arma cada pallet con sus LPN, a mano
+    o a partir de una propuesta automática.
+    Cada respuesta queda en el diario de la sesión; al retomar se sigue
+    después del último pallet guardado.
+    :param escaneo: True arma los pallets manuales escaneando sus LPN
+    :return: False si el usuario cancela
+    """
+    estado = sesion["estado"]
+    if estado["lleva_pallets"] is None:
+        # Usar questionary para opción sí/no
+        lleva_pallets = questionary.select(
+            "¿El pedido lleva pallets?",
+            choices=["Sí", "No", "Salir"]
+        ).ask()
+        if lleva_pallets == "Salir" or lleva_pallets is None:
+            return False
+        registrar(sesion, "lleva_pallets", valor=lleva_pallets)
+
+    en_pallet = {lpn for p in estado["pallets"] for lpn in p["LPNs"]}
+    remaining_lpns = [lpn for lpn in lpns if lpn not in en_pallet]
+    preguntar_mas = bool(estado["pallets"])
+
+    propuesta, aceptada = [], False
+    if estado["lleva_pallets"] == "Sí" and remaining_lpns:
+        propuesta, aceptada = proponer_pallets_automaticos(df_wms, indice_lpn, remaining_lpns, df_cajas)
+
+    while estado["lleva_pallets"] == "Sí" and remaining_lpns:
+        # Los pallets propuestos se arman seguidos, sin preguntar si hay más
+        sugeridos = []
+        pendientes = set(remaining_lpns)
+        while propuesta and not sugeridos:
+            sugeridos = [lpn for lpn in propuesta[0]["LPNs"] if lpn in pendientes]
+            if not sugeridos:
+                propuesta.pop(0)
+
+        if preguntar_mas and not sugeridos:
             mas_pallets = questionary.select(
                 "¿Más pallets?",
                 choices=["Sí", "No", "Salir"]
             ).ask()
             if mas_pallets != "Sí":
                 break
+            preguntar_mas = False
+
+        pallet_num = len(estado["pallets"]) + 1
+        print(f"\n📦 Selección de LPNs para Pallet {pallet_num}:")
+        if sugeridos and aceptada:
+            print(f"   {len(sugeridos)} LPNs de la propuesta: {' '.join(sugeridos)}")
+            selected_lpns = sugeridos
+        elif escaneo and not sugeridos:
+            selected_lpns = escanear_pallet(remaining_lpns)
+        else:
+            marcados = set(sugeridos)
+            selected_lpns = questionary.checkbox(
+                "Selecciona los LPNs para este pallet:",
+                choices=[questionary.Choice(lpn, checked=lpn in marcados) for lpn in remaining_lpns]
+                + ["Volver", "Salir"]
+            ).ask()
+
+        if selected_lpns is None or "Salir" in selected_lpns:
+            return False
+        if "Volver" in selected_lpns:
+            # Volver a preguntar si lleva pallets
+            lleva_pallets = questionary.select(
+                "¿El pedido lleva pallets?",
+                choices=["Sí", "No", "Salir"]
+            ).ask()
+            if lleva_pallets != "Sí":
+                # Sin pallets: se descartan los ya armados
+                registrar(sesion, "reiniciar_pallets")
+                registrar(sesion, "lleva_pallets", valor="No")
+                remaining_lpns = list(lpns)
+            propuesta, aceptada = [], False
+            continue
 
-            pallet_num += 1
+        if not selected_lpns:
+            print("❌ Debes seleccionar al menos un LPN.")
+            continue
 
-    print("\n🟩 Registro de peso y tipo de caja...\n")
+        peso = leer_peso(f"⚖️ Peso total del Pallet {pallet_num} (kg): ", teclado=input_numero)
+        alto = input_numero(f"📏 Altura del Pallet {pallet_num} (cm): ")
+        largo = input_numero(f"📏 Longitud del Pallet {pallet_num} (cm): ")
+        ancho = input_numero(f"📏 Ancho del Pallet {pallet_num} (cm): ")
+
+        registrar(sesion, "pallet", pallet={
+            "Pallet": f"Pallet{pallet_num}",
+            "LPNs": selected_lpns,
+            "Peso (kg)": peso,
+            "Alto (cm)": alto,
+            "Largo (cm)": largo,
+            "Ancho (cm)": ancho
+        })
 
-    pesos, altos, largos, anchos, nombre_caja, lpn_list = [], [], [], [], [], []
+        seleccionados = set(selected_lpns)
+        remaining_lpns = [lpn for lpn in remaining_lpns if lpn not in seleccionados]
+        preguntar_mas = True
+        if sugeridos:
+            propuesta.pop(0)
 
-    lpns_to_process = remaining_lpns if lleva_pallets == "Sí" else df_wms["LPN"].tolist()
-    df_filtrado = df_wms[df_wms["LPN"].isin(lpns_to_process)]
+    registrar(sesion, "pallets_listos")
+    return True
 
-    conteo = df_filtrado["LPN"].value_counts()
-    lpn_repetidos = conteo[conteo > 1].index.tolist()
-    lpn_unicos = conteo[conteo == 1].index.tolist()
 
-    def seleccionar_caja(df_cajas):
-        opciones_cajas = [
-            f"{i}. {row['NombreCaja']} - {row['Alto(cm)']}x{row['Largo(cm)']}x{row['Ancho(cm)']}"
-            for i, row in df_cajas.iterrows()
-        ] + ["Volver", "Salir"]
-        while True:
-            opcion = questionary.select(
-                "Selecciona el tipo de caja:",
-                choices=opciones_cajas
-            ).ask()
-            if opcion is None or opcion == "Salir":
-                return None
-            if opcion == "Volver":
-                return "Volver"
-            try:
-                idx = int(opcion.split(".")[0])
-                if 0 <= idx < len(df_cajas):
-                    return df_cajas.iloc[idx]
-            except Exception:
-                pass
-            print("❌ Selección inválida.")
-
-    for lpn in lpn_repetidos:
-        grupo = df_filtrado[df_filtrado["LPN"] == lpn]
+def registrar_bulto(df_wms, df_cajas, indice_lpn, lpn, sesion, historial, matriz):
+    """
+    Pide peso y tipo de caja de un LPN y lo guarda en la sesión. La caja
+    recomendada queda seleccionada por defecto.
+    :return: "Listo", "Volver" o None si se sale
+    """
+    posiciones = indice_lpn[lpn]
+    if len(posiciones) > 1:
+        grupo = df_wms.iloc[posiciones]
         print(f"\n🔁 LPN repetido: {lpn} ({len(grupo)} items)")
         print(f"   CodItems: {list(grupo['CodItem'])}")
+        peso = leer_peso("⚖️  Peso total de la caja (kg): ", teclado=input_numero)
+    else:
+        row = df_wms.iloc[posiciones[0]]
+        print(f"\n🔹 LPN único: {lpn} | CodItem: {row['CodItem']} | Unidades: {row['Unidades']}")
+        peso = leer_peso("⚖️  Peso (kg): ", teclado=input_numero)
+
+    coditems, unidades = contenido_lpn(df_wms, indice_lpn, lpn)
+    recomendada = recomendar_caja(df_cajas, matriz, coditems, unidades, historial)
+    caja_sel = seleccionar_caja(df_cajas, recomendada)
+    if caja_sel is None:
+        return None
+    if isinstance(caja_sel, str) and caja_sel == "Volver":
+        return "Volver"
+
+    registrar(sesion, "bulto", LPN=lpn, bulto={
+        "Peso (kg)": peso,
+        "CódigoCaja": caja_sel["CódigoCaja"],
+        "TipoCaja": caja_sel["NombreCaja"],
+        "Alto (cm)": caja_sel["Alto(cm)"],
+        "Largo (cm)": caja_sel["Largo(cm)"],
+        "Ancho (cm)": caja_sel["Ancho(cm)"],
+    })
+    # Los LPN siguientes del pedido ya aprovechan esta elección
+    registrar_eleccion_caja(
+        historial, coditems, unidades, caja_sel["CódigoCaja"], volumen_caja(caja_sel), peso
+    )
+    return "Listo"
 
-        peso = input_numero("⚖️  Peso total de la caja (kg): ")
 
-        caja_sel = seleccionar_caja(df_cajas)
-        if caja_sel is None:
-            print("Proceso cancelado por usuario.")
-            return
-        if caja_sel == "Volver":
-            # Volver a inicio de registro cajas
-            return run(df_wms, df_cajas)
-
-        pesos.append(peso)
-        altos.append(caja_sel["Alto(cm)"])
-        largos.append(caja_sel["Largo(cm)"])
-        anchos.append(caja_sel["Ancho(cm)"])
-        nombre_caja.append(caja_sel["NombreCaja"])
-        lpn_list.append(lpn)
-
-    for lpn in lpn_unicos:
-        row = df_filtrado[df_filtrado["LPN"] == lpn].iloc[0]
-        print(f"\n🔹 LPN único: {lpn} | CodItem: {row['CodItem']} | Unidades: {row['Unidades']}")
+@etapa("registro_bultos")
+def registrar_bultos(df_wms, df_cajas, indice_lpn, lpns, sesion):
+    """
+    Pide peso y tipo de caja de cada LPN, en el orden de lpns, saltando los que
+    ya tienen respuesta en la sesión. "Volver" deshace la respuesta del LPN
+    anterior y lo vuelve a preguntar.
+    :return: "Listo", "Volver" si se pide volver desde el primer LPN, o None si se sale
+    """
+    bultos = sesion["estado"]["bultos"]
+    historial = cargar_historial_cajas()
+    matriz = matriz_cajas(df_cajas)
+    i = 0
+    while i < len(lpns):
+        lpn = lpns[i]
+        if lpn in bultos:
+            i += 1
+            continue
+
+        resultado = registrar_bulto(df_wms, df_cajas, indice_lpn, lpn, sesion, historial, matriz)
+        if resultado is None:
+            return None
+        if resultado == "Volver":
+            if i == 0:
+                return "Volver"
+            i -= 1
+            registrar(sesion, "deshacer_bulto", LPN=lpns[i])
+            continue
+        i += 1
+    return "Listo"
+
 
-        peso = input_numero("⚖️  Peso (kg): ")
+@etapa("registro_bultos")
+def registrar_bultos_escaneando(df_wms, df_cajas, indice_lpn, lpns, sesion):
+    """
+    Registra los LPN en el orden en que se escanean sus etiquetas. "Volver"
+    en la caja descarta ese pesaje y el LPN se puede escanear de nuevo.
+    :return: "Listo" o None si se sale
+    """
+    historial = cargar_historial_cajas()
+    matriz = matriz_cajas(df_cajas)
+
+    def procesar(lpn):
+        resultado = registrar_bulto(df_wms, df_cajas, indice_lpn, lpn, sesion, historial, matriz)
+        if resultado is None:
+            return None
+        return resultado == "Listo"
+
+    if escanear_lpns(lpns, set(sesion["estado"]["bultos"]), procesar) is None:
+        return None
+    return "Listo"
+
+
+def run(df_wms, df_cajas):
+    """
+    Proceso para cliente Collahuasi.
+    Recibe df_wms y df_cajas, interactúa con usuario para definir pallets y cajas,
+    luego genera archivo Excel con resultados.
+    Las respuestas se guardan en un diario de sesión para retomar un pedido interrumpido.
+    """
+    print("\n🟦 Iniciando proceso Collahuasi...\n")
+
+    df_wms = descartar_filas_sin_lpn(df_wms)
+    sesion = abrir_sesion("collahuasi", df_wms)
+    estado = sesion["estado"]
+    todos_lpns = df_wms["LPN"].drop_duplicates().tolist()
+    indice_lpn = indexar_lpns(df_wms)
+
+    modo = questionary.select(
+        "¿Cómo desea registrar los LPN?",
+        choices=["Lista", "Escaneando códigos"]
+    ).ask()
+    escaneo = modo == "Escaneando códigos"
 
-        caja_sel = seleccionar_caja(df_cajas)
-        if caja_sel is None:
-            print("Proceso cancelado por usuario.")
+    while True:
+        if not estado["pallets_listos"] and not definir_pallets(
+            df_wms, df_cajas, indice_lpn, todos_lpns, sesion, escaneo
+        ):
+            print("Proceso cancelado por usuario. El avance queda guardado para retomarlo.")
             return
-        if caja_sel == "Volver":
-            return run(df_wms, df_cajas)
 
-        pesos.append(peso)
-        altos.append(caja_sel["Alto(cm)"])
-        largos.append(caja_sel["Largo(cm)"])
-        anchos.append(caja_sel["Ancho(cm)"])
-        nombre_caja.append(caja_sel["NombreCaja"])
-        lpn_list.append(lpn)
+        print("\n🟩 Registro de peso y tipo de caja...\n")
+
+        en_pallet = {lpn for p in estado["pallets"] for lpn in p["LPNs"]}
+        lpns_to_process = [lpn for lpn in todos_lpns if lpn not in en_pallet]
 
+        # LPN con varios items primero y luego los de un solo item
+        lpn_repetidos = [lpn for lpn in lpns_to_process if len(indice_lpn[lpn]) > 1]
+        lpn_unicos = [lpn for lpn in lpns_to_process if len(indice_lpn[lpn]) == 1]
+        lpn_list = lpn_repetidos + lpn_unicos
+
+        if escaneo:
+            resultado = registrar_bultos_escaneando(df_wms, df_cajas, indice_lpn, lpn_list, sesion)
+        else:
+            resultado = registrar_bultos(df_wms, df_cajas, indice_lpn, lpn_list, sesion)
+        if resultado is None:
+            print("Proceso cancelado por usuario. El avance queda guardado para retomarlo.")
+            return
+        if resultado == "Volver":
+            # Volver desde el primer LPN: se vuelve a definir los pallets
+            registrar(sesion, "reiniciar_pallets")
+            continue
+        break
+
+    if escaneo:
+        # Los bultos se numeran en el orden en que se escanearon
+        pendientes = set(lpn_list)
+        lpn_list = [lpn for lpn in estado["bultos"] if lpn in pendientes]
+    bultos = [estado["bultos"][lpn] for lpn in lpn_list]
     df_bultos = pd.DataFrame({
         "LPN": lpn_list,
-        "Peso (kg)": pesos,
-        "TipoCaja": nombre_caja,
-        "Alto (cm)": altos,
-        "Largo (cm)": largos,
-        "Ancho (cm)": anchos,
+        "Peso (kg)": [b["Peso (kg)"] for b in bultos],
+        "TipoCaja": [b["TipoCaja"] for b in bultos],
+        "Alto (cm)": [b["Alto (cm)"] for b in bultos],
+        "Largo (cm)": [b["Largo (cm)"] for b in bultos],
+        "Ancho (cm)": [b["Ancho (cm)"] for b in bultos],
     })
 
+    pallets = estado["pallets"]
+
     if pallets:
         pallet_rows = []
         for p in pallets:
@@ -221,59 +424,34 @@ def run(df_wms, df_cajas):
     else:
         df_pallets = pd.DataFrame()
 
-    with pd.ExcelWriter("output/bultos_pedido_collahuasi.xlsx") as writer:
-        if not df_pallets.empty:
-            df_pallets.to_excel(writer, sheet_name="Pallets", index=False)
-        df_bultos.to_excel(writer, sheet_name="Cajas", index=False)
-
-        df_bultos_unicos = df_bultos[~df_bultos["LPN"].duplicated()]
-        df_asn_cajas = agrupar_cajas(df_bultos_unicos)
-
-        if not df_pallets.empty:
-            pallets_simple = []
-            pallets_df = pd.DataFrame(pallets)
-            pallets_df["TipoCaja"] = "Pallet"
-
-            usados = set()
-            for i, row in pallets_df.iterrows():
-                if i in usados:
-                    continue
-                grupo = [row]
-                usados.add(i)
-                for j, row2 in pallets_df.iterrows():
-                    if j in usados or i == j:
-                        continue
-                    if (
-                        abs(row["Peso (kg)"] - row2["Peso (kg)"]) <= 0.5 and
-                        row["TipoCaja"] == row2["TipoCaja"] and
-                        row["Alto (cm)"] == row2["Alto (cm)"] and
-                        row["Largo (cm)"] == row2["Largo (cm)"] and
-                        row["Ancho (cm)"] == row2["Ancho (cm)"]
-                    ):
-                        grupo.append(row2)
-                        usados.add(j)
-                pallets_simple.append({
-                    "Tipo": "Pallet",
-                    "Unidades": len(grupo),
-                    "Peso(kg/unid)": round(sum([x["Peso (kg)"] for x in grupo]) / len(grupo), 2),
-                    "Alto(cm/unid)": row["Alto (cm)"],
-                    "Ancho(cm/unid)": row["Ancho (cm)"],
-                    "Largo(cm/unid)": row["Largo (cm)"]
-                })
+    hojas = {}
+    if not df_pallets.empty:
+        hojas["Pallets"] = df_pallets
+    hojas["Cajas"] = df_bultos
 
-            df_asn_pallets = pd.DataFrame(pallets_simple)
-            df_asn = pd.concat([df_asn_cajas, df_asn_pallets], ignore_index=True)
-        else:
-            df_asn = df_asn_cajas
+    df_bultos_unicos = df_bultos[~df_bultos["LPN"].duplicated()]
+    df_asn_cajas = agrupar_cajas(df_bultos_unicos)
+
+    if not df_pallets.empty:
+        pallets_df = pd.DataFrame(pallets)
+        pallets_df["TipoCaja"] = "Pallet"
+        df_asn_pallets = agrupar_cajas(pallets_df)
+        df_asn = pd.concat([df_asn_cajas, df_asn_pallets], ignore_index=True)
+    else:
+        df_asn = df_asn_cajas
+    hojas["ASN"] = df_asn
 
-        df_asn.to_excel(writer, sheet_name="ASN", index=False)
+    # Nueva pestaña detalle con columnas LPN, CodItem, NomItem, Unidades
+    columnas_detalle = ["LPN", "CodItem", "NomItem", "Unidades"]
+    df_detalle = df_wms[columnas_detalle]
+    hojas["detalle"] = df_detalle
 
-        # Nueva pestaña detalle con columnas LPN, CodItem, NomItem, Unidades
-        columnas_detalle = ["LPN", "CodItem", "NomItem", "Unidades"]
-        df_detalle = df_wms[columnas_detalle]
-        df_detalle.to_excel(writer, sheet_name="detalle", index=False)
+    with etapa("excel_bultos", filas=len(df_bultos) + len(df_wms)):
+        guardar_excel(ruta_salida("bultos_pedido_collahuasi.xlsx"), hojas)
 
     print("\n✅ Archivo 'bultos_pedido_collahuasi.xlsx' generado.")
+    cerrar_sesion(sesion)
+    actualizar_historial_cajas(elecciones_de_bultos(df_wms, indice_lpn, lpn_list, estado["bultos"]))
 
     # Preguntar si desea imprimir detalle para creación de guía
     respuesta = questionary.select(
@@ -284,15 +462,9 @@ def run(df_wms, df_cajas):
         print("Proceso finalizado sin imprimir guía.")
         return
 
-    coditem_db_path = "data/coditem_db.json"
-    if os.path.exists(coditem_db_path):
-        with open(coditem_db_path, "r", encoding="utf-8") as f:
-            coditem_db = json.load(f)
-    else:
-        coditem_db = {}
-
-    # Obtener CodItem únicos del detalle
+    # Obtener CodItem únicos del detalle y sus datos guardados en una sola consulta
     coditems_unicos = df_detalle[["CodItem", "NomItem"]].drop_duplicates()
+    coditem_db = obtener_coditems(coditems_unicos["CodItem"].astype(str))
 
     # Para cada CodItem distinto, validar o pedir datos
     for _, row in coditems_unicos.iterrows():
@@ -339,9 +511,8 @@ def run(df_wms, df_cajas):
                 "NomItem": nomitem
             }
 
-    # Guardar JSON actualizado
-    with open(coditem_db_path, "w", encoding="utf-8") as f:
-        json.dump(coditem_db, f, indent=2, ensure_ascii=False)
+    # Guardar cambios de todos los CodItem en una sola transacción
+    guardar_coditems(coditem_db)
 
     tiene_pallets = not df_pallets.empty
     tiene_bultos = not df_bultos.empty
@@ -390,18 +561,33 @@ def run(df_wms, df_cajas):
         return
 
     numero_referencia = input_no_espacios("Ingrese N° OC (Número de Referencia): ")
-    df_etiquetas = generar_etiquetas_despacho(df_wms, df_bultos, coditem_db, numero_referencia, df_pallets)
+    with etapa("etiquetas_despacho", filas=len(df_wms)):
+        df_etiquetas = generar_etiquetas_despacho(df_wms, df_bultos, coditem_db, numero_referencia, df_pallets)
 
     nro_guia = input_no_espacios("Ingrese NRO. DE GUIA: ")
     asn = input_no_espacios("Ingrese ASN: ")
-    df_etiquetas_grandes = generar_etiquetas_grandes(df_bultos, df_pallets, numero_referencia, nro_guia, asn)
+    with etapa("etiquetas_grandes", filas=len(df_bultos) + len(df_pallets)):
+        df_etiquetas_grandes = generar_etiquetas_grandes(df_bultos, df_pallets, numero_referencia, nro_guia, asn)
 
-    os.makedirs("output", exist_ok=True)
-    output_path = "output/etiquetas_peq.xlsx"
-    with pd.ExcelWriter(output_path) as writer:
-        df_etiquetas.to_excel(writer, sheet_name="etiqueta_peq", index=False)
-        df_etiquetas_grandes.to_excel(writer, sheet_name="etiqueta_grande", index=False)
-    print(f"\n✅ Etiquetas generadas en '{output_path}'")
+    formato_etiquetas = questionary.select(
+        "Formato de etiquetas:",
+        choices=["ZPL", "Excel (Zebra Designer)", "Ambos"]
+    ).ask()
+
+    if formato_etiquetas in ("ZPL", "Ambos"):
+        # ZPL directo a la impresora: las etiquetas repetidas se imprimen con ^PQ
+        path_peq = ruta_salida("etiquetas_peq.zpl")
+        path_grandes = ruta_salida("etiquetas_grandes.zpl")
+        with etapa("escribir_zpl", filas=len(df_etiquetas) + len(df_etiquetas_grandes)):
+            zpl_peq = escribir_zpl(path_peq, df_etiquetas, ETIQUETA_PEQ)
+            zpl_grandes = escribir_zpl(path_grandes, df_etiquetas_grandes, ETIQUETA_GRANDE)
+        print(f"\n✅ Etiquetas ZPL generadas en '{path_peq}' ({zpl_peq} de {len(df_etiquetas)}) "
+              f"y '{path_grandes}' ({zpl_grandes} de {len(df_etiquetas_grandes)})")
+    if formato_etiquetas in ("Excel (Zebra Designer)", "Ambos"):
+        output_path = ruta_salida("etiquetas_peq.xlsx")
+        with etapa("excel_etiquetas", filas=len(df_etiquetas) + len(df_etiquetas_grandes)):
+            guardar_excel(output_path, {"etiqueta_peq": df_etiquetas, "etiqueta_grande": df_etiquetas_grandes})
+        print(f"\n✅ Etiquetas generadas en '{output_path}'")
 
 
 def generar_etiquetas_despacho(df_wms, df_bultos, coditem_db, numero_referencia, df_pallets=None):
@@ -412,11 +598,16 @@ def generar_etiquetas_despacho(df_wms, df_bultos, coditem_db, numero_referencia,
     - coditem_db: dict con info adicional por CodItem (NItem, NroParte)
     - numero_referencia: string con N° OC (Número de Referencia)
     - df_pallets: DataFrame con info de pallets (opcional)
-    
+
+    Por cada LPN: 2 etiquetas con la cantidad total de cada CodItem y, si el LPN
+    tiene más de un CodItem, además 1 etiqueta de cantidad 1 por cada unidad.
+    Las filas se arman repitiendo índices del resumen por LPN y CodItem, sin
+    recorrer unidad por unidad.
+
     Retorna un DataFrame con columnas:
     ['N° OC', 'N° ITEM', 'CÓDIGO CLIENTE', 'N° DE PARTE', 'CANTIDAD', 'LPN']
     """
-    etiquetas = []
+    columnas = ["N° OC", "N° ITEM", "CÓDIGO CLIENTE", "N° DE PARTE", "CANTIDAD", "LPN"]
 
     # Obtener LPNs de pallets si existen
     lpn_pallets = []
@@ -426,73 +617,54 @@ def generar_etiquetas_despacho(df_wms, df_bultos, coditem_db, numero_referencia,
     # LPNs de bultos
     lpn_bultos = df_bultos["LPN"].unique().tolist()
 
-    # Unión de todos los LPNs a procesar
+    # Unión de todos los LPNs a procesar, en el orden en que se imprimen
     lpn_todos = sorted(set(lpn_pallets) | set(lpn_bultos))
+    orden_lpn = {lpn: i for i, lpn in enumerate(lpn_todos)}
 
     # Agrupar por LPN y CodItem para obtener cantidades por item en cada LPN
-    df_lpn_coditem = df_wms.groupby(["LPN", "CodItem", "NomItem"], as_index=False)["Unidades"].sum()
-
-    # Para cada LPN en la unión de pallets y bultos
-    for lpn in lpn_todos:
-        df_lpn = df_lpn_coditem[df_lpn_coditem["LPN"] == lpn]
-
-        # Caso 1: solo un CodItem en LPN
-        if len(df_lpn) == 1:
-            row = df_lpn.iloc[0]
-            coditem = str(row["CodItem"])
-            unidades = int(row["Unidades"])
-            nitem = coditem_db.get(coditem, {}).get("NItem", "")
-            nroparte = coditem_db.get(coditem, {}).get("NroParte", "")
-
-            # Generar 2 etiquetas iguales para la caja (cantidad total)
-            for _ in range(2):
-                etiquetas.append({
-                    "N° OC": numero_referencia,
-                    "N° ITEM": nitem,
-                    "CÓDIGO CLIENTE": coditem,
-                    "N° DE PARTE": nroparte,
-                    "CANTIDAD": unidades,
-                    "LPN": lpn
-                })
-
-        else:
-            # Caso 2: más de un CodItem en LPN
-            # Primero 2 etiquetas por cada CodItem con cantidad total
-            for _, row in df_lpn.iterrows():
-                coditem = str(row["CodItem"])
-                unidades = int(row["Unidades"])
-                nitem = coditem_db.get(coditem, {}).get("NItem", "")
-                nroparte = coditem_db.get(coditem, {}).get("NroParte", "")
-
-                for _ in range(2):
-                    etiquetas.append({
-                        "N° OC": numero_referencia,
-                        "N° ITEM": nitem,
-                        "CÓDIGO CLIENTE": coditem,
-                        "N° DE PARTE": nroparte,
-                        "CANTIDAD": unidades,
-                        "LPN": lpn
-                    })
-
-            # Luego etiquetas pequeñas cantidad 1 para cada unidad de cada CodItem
-            for _, row in df_lpn.iterrows():
-                coditem = str(row["CodItem"])
-                unidades = int(row["Unidades"])
-                nitem = coditem_db.get(coditem, {}).get("NItem", "")
-                nroparte = coditem_db.get(coditem, {}).get("NroParte", "")
-
-                for _ in range(unidades):
-                    etiquetas.append({
-                        "N° OC": numero_referencia,
-                        "N° ITEM": nitem,
-                        "CÓDIGO CLIENTE": coditem,
-                        "N° DE PARTE": nroparte,
-                        "CANTIDAD": 1,
-                        "LPN": lpn
-                    })
-
-    df_etiquetas = pd.DataFrame(etiquetas, columns=["N° OC", "N° ITEM", "CÓDIGO CLIENTE", "N° DE PARTE", "CANTIDAD", "LPN"])
-    return df_etiquetas
+    df_lpn_coditem = df_wms.groupby(["LPN", "CodItem", "NomItem"], as_index=False, observed=True)["Unidades"].sum()
+    df_lpn_coditem["_orden"] = df_lpn_coditem["LPN"].astype(object).map(orden_lpn)
+    df_lpn_coditem = df_lpn_coditem[df_lpn_coditem["_orden"].notna()]
+    df_lpn_coditem = df_lpn_coditem.sort_values("_orden", kind="stable").reset_index(drop=True)
+    if df_lpn_coditem.empty:
+        return pd.DataFrame(columns=columnas)
+
+    # NItem y NroParte de cada CodItem con un solo merge
+    df_lpn_coditem["CÓDIGO CLIENTE"] = df_lpn_coditem["CodItem"].astype(str)
+    df_info = pd.DataFrame({
+        "CÓDIGO CLIENTE": list(coditem_db.keys()),
+        "NItem": [info.get("NItem", "") for info in coditem_db.values()],
+        "NroParte": [info.get("NroParte", "") for info in coditem_db.values()],
+    }, dtype=object)
+    df_lpn_coditem = df_lpn_coditem.merge(df_info, on="CÓDIGO CLIENTE", how="left")
+    sin_info = ~df_lpn_coditem["CÓDIGO CLIENTE"].isin(df_info["CÓDIGO CLIENTE"])
+    df_lpn_coditem.loc[sin_info, ["NItem", "NroParte"]] = ""
+
+    orden = df_lpn_coditem["_orden"].to_numpy(dtype=np.int64)
+    unidades = df_lpn_coditem["Unidades"].to_numpy().astype(np.int64)
+    varios_coditems = np.bincount(orden)[orden] > 1
+
+    # 2 etiquetas con la cantidad total por cada CodItem de cada LPN
+    idx_total = np.repeat(np.arange(len(df_lpn_coditem)), 2)
+    # 1 etiqueta por unidad en los LPN con más de un CodItem
+    filas_varios = np.flatnonzero(varios_coditems)
+    idx_unidad = np.repeat(filas_varios, unidades[filas_varios].clip(min=0))
+
+    idx = np.concatenate([idx_total, idx_unidad])
+    cantidad = np.concatenate([unidades[idx_total], np.ones(len(idx_unidad), dtype=np.int64)])
+    bloque = np.concatenate([np.zeros(len(idx_total), dtype=np.int8), np.ones(len(idx_unidad), dtype=np.int8)])
+    # Por LPN: primero las etiquetas de total y luego las de unidad (lexsort es estable)
+    ordenadas = np.lexsort((bloque, orden[idx]))
+    idx = idx[ordenadas]
+
+    return pd.DataFrame({
+        "N° OC": numero_referencia,
+        "N° ITEM": df_lpn_coditem["NItem"].to_numpy()[idx],
+        "CÓDIGO CLIENTE": df_lpn_coditem["CÓDIGO CLIENTE"].to_numpy()[idx],
+        "N° DE PARTE": df_lpn_coditem["NroParte"].to_numpy()[idx],
+        "CANTIDAD": cantidad[ordenadas],
+        "LPN": df_lpn_coditem["LPN"].astype(object).to_numpy()[idx],
+    }, columns=columnas)
 
 
 def generar_etiquetas_grandes(df_bultos, df_pallets, numero_referencia, nro_guia, asn):
@@ -501,50 +673,40 @@ def generar_etiquetas_grandes(df_bultos, df_pallets, numero_referencia, nro_guia
     Devuelve un DataFrame con columnas:
     ['CLIENTE', 'DESTINO', 'PROVEEDOR', 'OC', 'NRO. DE GUIA', 'ASN', 'CANT BULTOS', 'PESO', 'LPN', 'TIPO']
     """
-    etiquetas = []
-
-    # Datos fijos
-    cliente = "COMPAÑIA MINERA DOÑA INES DE COLLAHUASI"
-    destino = "BODEGA ROSARIO"
-    proveedor = "COMERCIAL, SERVICIOS E INGENIERIA CSI SPA"
-
-    # Etiquetas para bultos (cajas)
-    lpn_bultos = df_bultos["LPN"].tolist()
-    total_bultos = len(lpn_bultos)
-    for idx, lpn in enumerate(lpn_bultos, 1):
-        peso = df_bultos[df_bultos["LPN"] == lpn]["Peso (kg)"].values[0]
-        etiquetas.append({
-            "CLIENTE": cliente,
-            "DESTINO": destino,
-            "PROVEEDOR": proveedor,
-            "OC": numero_referencia,
-            "NRO. DE GUIA": nro_guia,
-            "ASN": asn,
-            "CANT BULTOS": f"{str(idx).zfill(2)} DE {str(total_bultos).zfill(2)}",
-            "PESO": peso,
-            "LPN": lpn,
-            "TIPO": "BULTO"
-        })
+    columnas = [
+        "CLIENTE", "DESTINO", "PROVEEDOR", "OC", "NRO. DE GUIA", "ASN",
+        "CANT BULTOS", "PESO", "LPN", "TIPO"
+    ]
+
+    # Etiquetas para bultos (cajas): el peso es el del primer registro de cada LPN
+    peso_por_lpn = df_bultos.drop_duplicates(subset=["LPN"]).set_index("LPN")["Peso (kg)"]
+    total_bultos = len(df_bultos)
+    contador = pd.Series(np.arange(1, total_bultos + 1)).astype(str).str.zfill(2)
+    bultos = pd.DataFrame({
+        "CANT BULTOS": (contador + f" DE {str(total_bultos).zfill(2)}").to_numpy(),
+        "PESO": df_bultos["LPN"].map(peso_por_lpn).to_numpy(),
+        "LPN": df_bultos["LPN"].to_numpy(),
+        "TIPO": "BULTO",
+    })
 
     # Etiquetas para pallets (solo 1 por pallet)
+    partes = [bultos]
     if df_pallets is not None and not df_pallets.empty:
-        # Agrupar por Pallet y tomar solo una fila por cada uno
         pallets_unicos = df_pallets.drop_duplicates(subset=["Pallet"])
-        for _, row in pallets_unicos.iterrows():
-            etiquetas.append({
-                "CLIENTE": cliente,
-                "DESTINO": destino,
-                "PROVEEDOR": proveedor,
-                "OC": numero_referencia,
-                "NRO. DE GUIA": nro_guia,
-                "ASN": asn,
-                "CANT BULTOS": "01 DE 01",
-                "PESO": row["Peso (kg)"],
-                "LPN": row["Pallet"],
-                "TIPO": "PALLET"
-            })
-
-    return pd.DataFrame(etiquetas, columns=[
-        "CLIENTE", "DESTINO", "PROVEEDOR", "OC", "NRO. DE GUIA", "ASN",
-        "CANT BULTOS", "PESO", "LPN", "TIPO"
-    ])
\ No newline at end of file
+        partes.append(pd.DataFrame({
+            "CANT BULTOS": "01 DE 01",
+            "PESO": pallets_unicos["Peso (kg)"].to_numpy(),
+            "LPN": pallets_unicos["Pallet"].to_numpy(),
+            "TIPO": "PALLET",
+        }))
+
+    etiquetas = pd.concat(partes, ignore_index=True)
+
+    # Datos fijos
+    etiquetas["CLIENTE"] = "COMPAÑIA MINERA DOÑA INES DE COLLAHUASI"
+    etiquetas["DESTINO"] = "BODEGA ROSARIO"
+    etiquetas["PROVEEDOR"] = "COMERCIAL, SERVICIOS E INGENIERIA CSI SPA"
+    etiquetas["OC"] = numero_referencia
+    etiquetas["NRO. DE GUIA"] = nro_guia
+    etiquetas["ASN"] = asn
+    return etiquetas[columnas]
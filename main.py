@@ -1,29 +1,21 @@
 # main.py
+import argparse
+import multiprocessing
 import os
 import json
-import pandas as pd
 import questionary
 
+# pandas, openpyxl y tkinter se importan recién cuando un proceso los usa,
+# para que el menú abra rápido (sobre todo en el ejecutable de PyInstaller)
 from utils.seleccion_archivo import seleccionar_archivo
 from utils.cajas import cargar_cajas, agregar_caja, editar_caja, eliminar_caja
+from utils.registro_clientes import CLIENTES_DIR, cargar_cliente
+from utils.respuestas import cargar_respuestas, respuestas_predefinidas
+from utils.rutas import DATA_DIR, OUTPUT_DIR, resource_path
+from utils.telemetria import corrida, espera, etapa, imprimir_resumen, leer_log, resumir
 import sys
 
 
-def resource_path(relative_path):
-    """Obtiene la ruta absoluta, compatible con PyInstaller"""
-    try:
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-
-    return os.path.join(base_path, relative_path)
-
-
-DATA_DIR = "data"
-OUTPUT_DIR = "output"
-CLIENTES_DIR = "clientes"
-
-
 def cargar_database():
     path = resource_path(os.path.join(DATA_DIR, "database_db.json"))
 
@@ -72,19 +64,7 @@ def seleccionar_cliente(database, owner):
         return seleccion
 
 
-def cargar_cliente_module(cliente_name):
-    import importlib.util
-    path = os.path.join(CLIENTES_DIR, f"{cliente_name.lower()}.py")
-    if not os.path.exists(path):
-        print(f"❌ No se encontró el módulo para cliente '{cliente_name}' en {path}")
-        return None
-    spec = importlib.util.spec_from_file_location(cliente_name, path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
-
-
-def main_menu():
+def main_menu(perfilar=False):
     while True:
         opcion = questionary.select(
             "\n=== Menú Principal ===",
@@ -97,7 +77,7 @@ def main_menu():
         if opcion == "Editar cajas":
             menu_editar_cajas()
         elif opcion == "Seleccionar Owner y cliente para ejecutar proceso":
-            ejecutar_proceso_cliente()
+            ejecutar_proceso_cliente(perfilar)
         elif opcion == "Salir" or opcion is None:
             print("Saliendo...")
             break
@@ -204,7 +184,24 @@ def eliminar_caja_interactivo(cajas):
         print("❌ Caja no encontrada.")
 
 
-def ejecutar_proceso_cliente():
+def cargar_df_cajas():
+    """Devuelve las cajas de data/cajas.txt como DataFrame ordenado, o None si no hay."""
+    import pandas as pd
+
+    cajas_list = cargar_cajas()
+    if not cajas_list:
+        return None
+    return pd.DataFrame(cajas_list).sort_values(by="CódigoCaja").reset_index(drop=True)
+
+
+def leer_wms(archivo_wms, cliente_mod):
+    """Lee el archivo WMS con las columnas que usa el cliente."""
+    from utils.wms import leer_archivo_wms
+
+    return leer_archivo_wms(archivo_wms, getattr(cliente_mod, "COLUMNAS_WMS", None))
+
+
+def ejecutar_proceso_cliente(perfilar=False):
     database = cargar_database()
     if not database:
         return
@@ -225,39 +222,152 @@ def ejecutar_proceso_cliente():
                 break  # volver a seleccionar owner
             if cliente == "Volver":
                 break
-            cliente_mod = cargar_cliente_module(cliente)
+            cliente_mod = cargar_cliente(cliente)
             if cliente_mod is None or not hasattr(cliente_mod, "run"):
                 print(f"❌ El cliente '{cliente}' no tiene función run(df_wms, df_cajas).")
                 input("Presione Enter para continuar...")
                 return
-            print("\nSeleccione archivo WMS (Excel o CSV):")
-            archivo_wms = seleccionar_archivo("excel")
-            cajas_list = cargar_cajas()
-            if not cajas_list:
-                print("❌ No se encontraron cajas en data/cajas.txt")
-                input("Presione Enter para continuar...")
-                return
-            df_cajas = pd.DataFrame(cajas_list).sort_values(by="CódigoCaja").reset_index(drop=True)
-            try:
-                if archivo_wms.lower().endswith(".csv"):
-                    df_wms = pd.read_csv(archivo_wms, sep=",", encoding="latin1")
-                else:
-                    df_wms = pd.read_excel(archivo_wms)
-            except Exception as e:
-                print(f"❌ Error leyendo archivo WMS: {e}")
-                input("Presione Enter para continuar...")
-                return
-            print(f"\nEjecutando proceso para cliente '{cliente}'...\n")
-            cliente_mod.run(df_wms, df_cajas)
+            with corrida(cliente, owner=owner, modo="interactivo", perfilado=perfilar) as registro:
+                print("\nSeleccione archivo WMS (Excel o CSV):")
+                with espera():
+                    archivo_wms = seleccionar_archivo("excel")
+                df_cajas = cargar_df_cajas()
+                if df_cajas is None:
+                    print("❌ No se encontraron cajas en data/cajas.txt")
+                    registro["estado"] = "error"
+                    input("Presione Enter para continuar...")
+                    return
+                try:
+                    with etapa("leer_wms") as medida:
+                        df_wms = leer_wms(archivo_wms, cliente_mod)
+                        medida["filas"] = len(df_wms)
+                except Exception as e:
+                    print(f"❌ Error leyendo archivo WMS: {e}")
+                    registro["estado"] = "error"
+                    input("Presione Enter para continuar...")
+                    return
+                print(f"\nEjecutando proceso para cliente '{cliente}'...\n")
+                ejecutar_cliente(cliente, cliente_mod, df_wms, df_cajas, perfilar)
             print("\nProceso finalizado.")
             input("Presione Enter para continuar...")
             limpiar_consola()
             return  # Termina la función para evitar reinicios
 
 
+def ejecutar_cliente(cliente, cliente_mod, df_wms, df_cajas, perfilar=False):
+    """
+    Llama a run(df_wms, df_cajas) del cliente; con perfilar, bajo cProfile y
+    tracemalloc (el módulo de perfilado se importa solo en ese caso).
+    """
+    if not perfilar:
+        return cliente_mod.run(df_wms, df_cajas)
+    from utils.perfilado import ejecutar_perfilado
+    return ejecutar_perfilado(cliente, cliente_mod.run, df_wms, df_cajas)
+
+
+def ejecutar_headless(owner, cliente, archivo_wms, archivo_respuestas=None, perfilar=False, retomar=False):
+    """
+    Ejecuta el proceso de un cliente sin menús ni diálogos.
+    Las preguntas del cliente se responden con el archivo JSON de respuestas.
+    Con perfilar se guarda un perfil de cProfile y tracemalloc en output/perfiles/.
+    Una sesión sin terminar del mismo pedido se descarta, salvo con retomar.
+    Retorna 0 si el proceso terminó, 1 si hubo un error.
+    """
+    database = cargar_database()
+    clientes = database.get("Owners", {}).get(owner)
+    if clientes is None:
+        print(f"❌ Owner '{owner}' no existe en database_db.json")
+        return 1
+    if cliente not in clientes:
+        print(f"❌ Cliente '{cliente}' no pertenece al Owner '{owner}'")
+        return 1
+    cliente_mod = cargar_cliente(cliente)
+    if cliente_mod is None or not hasattr(cliente_mod, "run"):
+        print(f"❌ El cliente '{cliente}' no tiene función run(df_wms, df_cajas).")
+        return 1
+    df_cajas = cargar_df_cajas()
+    if df_cajas is None:
+        print("❌ No se encontraron cajas en data/cajas.txt")
+        return 1
+    respuestas = cargar_respuestas(archivo_respuestas) if archivo_respuestas else []
+
+    with respuestas_predefinidas(respuestas, retomar) as pendientes, \
+            corrida(cliente, owner=owner, modo="headless", perfilado=perfilar) as registro:
+        try:
+            with etapa("leer_wms") as medida:
+                df_wms = leer_wms(archivo_wms, cliente_mod)
+                medida["filas"] = len(df_wms)
+        except Exception as e:
+            print(f"❌ Error leyendo archivo WMS: {e}")
+            registro["estado"] = "error"
+            return 1
+
+        print(f"\nEjecutando proceso para cliente '{cliente}'...\n")
+        try:
+            ejecutar_cliente(cliente, cliente_mod, df_wms, df_cajas, perfilar)
+        except EOFError as e:
+            print(f"❌ {e}")
+            registro["estado"] = "error"
+            registro["error"] = str(e)
+            return 1
+    if pendientes:
+        print(f"⚠️ Quedaron {len(pendientes)} respuestas sin usar.")
+    print("\nProceso finalizado.")
+    return 0
+
+
+def ejecutar_lote_manifiesto(archivo_manifiesto, procesos=None):
+    """
+    Ejecuta en paralelo los pedidos de un manifiesto, cada uno como ejecutar_headless.
+    Retorna 0 si todos terminaron, 1 si alguno falló.
+    """
+    from utils.lote import cargar_manifiesto, ejecutar_lote
+
+    try:
+        trabajos = cargar_manifiesto(archivo_manifiesto)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error leyendo manifiesto: {e}")
+        return 1
+    resultados = ejecutar_lote(trabajos, ejecutar_headless, procesos)
+    return 0 if all(r["estado"] == "ok" for r in resultados) else 1
+
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="UpperApp")
+    parser.add_argument("--profile", action="store_true",
+                        help="Perfilar el proceso del cliente con cProfile y tracemalloc (resultado en output/perfiles/)")
+    subparsers = parser.add_subparsers(dest="comando")
+    run_parser = subparsers.add_parser("run", help="Ejecuta un cliente sin interacción")
+    run_parser.add_argument("--owner", required=True, help="Owner en database_db.json (ej. JAL)")
+    run_parser.add_argument("--client", required=True, help="Cliente del Owner (ej. Tottus)")
+    run_parser.add_argument("--wms", required=True, help="Archivo WMS (Excel o CSV)")
+    run_parser.add_argument("--answers", help="JSON con las respuestas a las preguntas del cliente")
+    run_parser.add_argument("--resume", action="store_true",
+                            help="Retomar la sesión sin terminar del pedido (por defecto se empieza de nuevo)")
+    # También se acepta después de "run"; SUPPRESS conserva el valor del parser principal
+    run_parser.add_argument("--profile", action="store_true", default=argparse.SUPPRESS,
+                            help="Perfilar el proceso del cliente")
+    lote_parser = subparsers.add_parser("lote", help="Ejecuta varios pedidos en paralelo desde un manifiesto")
+    lote_parser.add_argument("manifiesto", help="JSON con la lista de trabajos (owner, client, wms, answers)")
+    lote_parser.add_argument("--procesos", type=int, help="Cantidad de procesos (por defecto uno por núcleo)")
+    telemetria_parser = subparsers.add_parser("telemetria", help="Resumen p50/p95 por etapa de las corridas registradas")
+    telemetria_parser.add_argument("--cliente", help="Mostrar solo este cliente")
+    telemetria_parser.add_argument("--log", help="Archivo de telemetría (por defecto output/telemetria.jsonl)")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     os.makedirs(DATA_DIR, exist_ok=True)
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     os.makedirs(CLIENTES_DIR, exist_ok=True)
     os.makedirs("utils", exist_ok=True)
-    main_menu()
\ No newline at end of file
+    args = parsear_argumentos()
+    if args.comando == "run":
+        sys.exit(ejecutar_headless(args.owner, args.client, args.wms, args.answers, args.profile, args.resume))
+    if args.comando == "lote":
+        sys.exit(ejecutar_lote_manifiesto(args.manifiesto, args.procesos))
+    if args.comando == "telemetria":
+        imprimir_resumen(resumir(leer_log(args.log), args.cliente))
+        sys.exit(0)
+    main_menu(args.profile)
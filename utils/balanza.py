@@ -0,0 +1,209 @@
+# utils/balanza.py
+import asyncio
+import os
+import re
+from contextlib import suppress
+from urllib.parse import parse_qs, urlsplit
+
+from utils.telemetria import espera
+
+# Fuente de pesos: vacío o "teclado" para ingreso manual,
+# "tcp://host:puerto" o "serial://COM3?baudios=9600" para leer una balanza
+VARIABLE_BALANZA = "UPPERAPP_BALANZA"
+VARIABLE_TIMEOUT = "UPPERAPP_BALANZA_TIMEOUT"
+TIMEOUT_BALANZA = 120.0
+
+# Lecturas tipo 'ST,GS,+  12.345kg' (estable), 'US,NT,-0.020 kg' (inestable) o '12.34'
+PATRON_LECTURA = re.compile(
+    r"^\s*(?:(?P<estado>ST|US|OL)\s*,\s*(?:[A-Z]{2}\s*,\s*)?)?"
+    r"(?P<signo>[-+])?\s*(?P<valor>\d+(?:[.,]\d+)?)\s*(?P<unidad>kg|g|lb)?\s*$",
+    re.IGNORECASE,
+)
+FACTOR_KG = {"kg": 1.0, "g": 0.001, "lb": 0.45359237}
+
+_fuente = None
+_fuente_cargada = False
+
+
+def parsear_lectura(linea):
+    """
+    Interpreta una línea enviada por la balanza.
+    :return: (peso en kg, estable) o None si la línea no trae un peso válido.
+             estable es True/False si la balanza lo informa y None si no.
+    """
+    m = PATRON_LECTURA.match(linea)
+    if not m:
+        return None
+    estado = (m.group("estado") or "").upper()
+    if estado == "OL":
+        # Sobrecarga: la balanza no tiene un valor que informar
+        return None
+    valor = float(m.group("valor").replace(",", "."))
+    if m.group("signo") == "-":
+        valor = -valor
+    peso = valor * FACTOR_KG[(m.group("unidad") or "kg").lower()]
+    return round(peso, 3), {"ST": True, "US": False}.get(estado)
+
+
+def detector_estable(lecturas_iguales=3, tolerancia=0.01, minimo=0.05):
+    """
+    Devuelve una función que recibe cada lectura (peso, estable) y retorna el
+    peso cuando hay una lectura estable sobre el mínimo. Si la balanza no
+    informa estabilidad se espera lecturas_iguales seguidas dentro de la tolerancia.
+    Después de capturar un peso la balanza debe volver a cero antes del
+    siguiente, para no registrar dos veces la misma caja.
+    """
+    ventana = []
+    esperando_retiro = False
+
+    def procesar(peso, estable):
+        nonlocal esperando_retiro
+        if peso < minimo:
+            esperando_retiro = False
+            ventana.clear()
+            return None
+        if esperando_retiro or estable is False:
+            ventana.clear()
+            return None
+        if estable is None:
+            if ventana and abs(peso - ventana[-1]) > tolerancia:
+                ventana.clear()
+            ventana.append(peso)
+            if len(ventana) < lecturas_iguales:
+                return None
+        ventana.clear()
+        esperando_retiro = True
+        return peso
+
+    return procesar
+
+
+async def leer_estable(abrir, detector, timeout):
+    """
+    Lee líneas de la balanza hasta obtener un peso estable.
+    :param abrir: corrutina que devuelve (reader, writer) de asyncio
+    :param detector: función de detector_estable
+    :param timeout: segundos máximos de espera
+    :return: peso en kg, o None si la balanza cerró la conexión
+    """
+    reader, writer = await abrir()
+
+    async def leer():
+        while True:
+            linea = await reader.readline()
+            if not linea:
+                return None
+            lectura = parsear_lectura(linea.decode("ascii", errors="ignore"))
+            if lectura is None:
+                continue
+            peso = detector(*lectura)
+            if peso is not None:
+                return peso
+
+    try:
+        return await asyncio.wait_for(leer(), timeout)
+    finally:
+        writer.close()
+        with suppress(Exception):
+            await writer.wait_closed()
+
+
+def fuente_stream(abrir, descripcion, timeout=TIMEOUT_BALANZA):
+    """
+    Fuente de pesos que lee una balanza por un stream asyncio (TCP o serial).
+    Se abre una conexión por pesaje y el detector de estabilidad se conserva
+    entre pesajes.
+    :return: función(mensaje) -> peso en kg, o None si no hubo lectura
+    """
+    detector = detector_estable()
+
+    def fuente(mensaje):
+        print(f"{mensaje}(esperando balanza {descripcion}...)")
+        try:
+            # El tiempo hasta que el peso se estabiliza es del operador, no de cálculo
+            with espera():
+                peso = asyncio.run(leer_estable(abrir, detector, timeout))
+        except (OSError, asyncio.TimeoutError) as e:
+            print(f"⚠️ Sin lectura de la balanza ({type(e).__name__}).")
+            return None
+        if peso is not None:
+            print(f"⚖️ {peso:.3f} kg")
+        return peso
+
+    return fuente
+
+
+def fuente_tcp(host, puerto, timeout=TIMEOUT_BALANZA):
+    return fuente_stream(lambda: asyncio.open_connection(host, puerto), f"{host}:{puerto}", timeout)
+
+
+def fuente_serial(puerto, baudios=9600, timeout=TIMEOUT_BALANZA):
+    """
+    Balanza por puerto serial. Requiere pyserial-asyncio; sin él se usa el teclado.
+    """
+    try:
+        import serial_asyncio
+    except ImportError:
+        print("⚠️ Falta pyserial-asyncio para leer la balanza serial. Se usará el teclado.")
+        return None
+    return fuente_stream(
+        lambda: serial_asyncio.open_serial_connection(url=puerto, baudrate=baudios),
+        puerto,
+        timeout,
+    )
+
+
+def crear_fuente(config, timeout=TIMEOUT_BALANZA):
+    """
+    Crea la fuente de pesos según la configuración.
+    :param config: "", "teclado", "tcp://host:puerto" o "serial://puerto?baudios=9600"
+                   (ej. serial://COM3 o serial:///dev/ttyUSB0)
+    :return: función(mensaje) -> peso, o None para ingreso por teclado
+    """
+    config = (config or "").strip()
+    if not config or config.lower() == "teclado":
+        return None
+    url = urlsplit(config)
+    if url.scheme == "tcp" and url.hostname and url.port:
+        return fuente_tcp(url.hostname, url.port, timeout)
+    if url.scheme == "serial" and (url.netloc or url.path):
+        baudios = int(parse_qs(url.query).get("baudios", ["9600"])[0])
+        return fuente_serial(url.netloc + url.path, baudios, timeout)
+    print(f"⚠️ Configuración de balanza inválida '{config}'. Se usará el teclado.")
+    return None
+
+
+def fuente_configurada():
+    """
+    Fuente de pesos de la variable de entorno UPPERAPP_BALANZA, creada una sola vez.
+    """
+    global _fuente, _fuente_cargada
+    if not _fuente_cargada:
+        timeout = float(os.environ.get(VARIABLE_TIMEOUT, TIMEOUT_BALANZA))
+        _fuente = crear_fuente(os.environ.get(VARIABLE_BALANZA, ""), timeout)
+        _fuente_cargada = True
+    return _fuente
+
+
+def pedir_peso_teclado(mensaje):
+    while True:
+        try:
+            return float(input(mensaje))
+        except ValueError:
+            print("❌ Ingresa un número válido.")
+
+
+def leer_peso(mensaje, teclado=pedir_peso_teclado):
+    """
+    Pide un peso a la balanza configurada o, si no hay o no responde, por teclado.
+    :param mensaje: texto de la pregunta, ej. "⚖️ Peso (kg): "
+    :param teclado: función(mensaje) -> float para el ingreso manual
+    :return: peso en kg
+    """
+    fuente = fuente_configurada()
+    if fuente is not None:
+        peso = fuente(mensaje)
+        if peso is not None:
+            return peso
+        print("⌨️ Ingrese el peso a mano.")
+    return teclado(mensaje)
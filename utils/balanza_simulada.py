@@ -0,0 +1,73 @@
+# utils/balanza_simulada.py
+"""
+Balanza simulada por TCP para probar la lectura de pesos sin hardware.
+Cada conexión recibe el siguiente peso de la lista: unas lecturas en cero,
+luego lecturas inestables y después el peso estable hasta que se cierra la conexión.
+Uso: python -m utils.balanza_simulada 12.5 8 7.25 --puerto 4001
+     y en otra consola UPPERAPP_BALANZA=tcp://127.0.0.1:4001 python main.py ...
+"""
+import argparse
+import asyncio
+import itertools
+
+
+def lineas_pesaje(peso, con_estado=True):
+    """
+    Secuencia de lecturas de un pesaje: cero, inestable y el peso estable (infinito).
+    :param con_estado: False imita balanzas que no informan ST/US
+    """
+    def linea(valor, estado):
+        if con_estado:
+            return f"{estado},GS,+{valor:9.3f}kg\r\n"
+        return f"{valor:.3f}\r\n"
+
+    yield linea(0.0, "ST")
+    yield linea(0.0, "ST")
+    yield linea(peso * 0.6, "US")
+    yield linea(peso * 1.05, "US")
+    while True:
+        yield linea(peso, "ST")
+
+
+async def servir_balanza(pesos, host="127.0.0.1", puerto=4001, intervalo=0.05, con_estado=True):
+    """
+    Levanta la balanza simulada y atiende conexiones hasta que se cancela.
+    :param pesos: pesos en kg que se entregan en orden, uno por conexión (se repiten al terminar)
+    :param intervalo: segundos entre lecturas
+    """
+    siguiente = itertools.cycle(pesos)
+
+    async def atender(reader, writer):
+        try:
+            for texto in lineas_pesaje(next(siguiente), con_estado):
+                writer.write(texto.encode("ascii"))
+                await writer.drain()
+                await asyncio.sleep(intervalo)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(atender, host, puerto)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Balanza simulada por TCP")
+    parser.add_argument("pesos", nargs="+", type=float, help="Pesos en kg, uno por pesaje")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=4001)
+    parser.add_argument("--intervalo", type=float, default=0.05, help="Segundos entre lecturas")
+    parser.add_argument("--sin-estado", action="store_true", help="No enviar ST/US en las lecturas")
+    args = parser.parse_args()
+
+    print(f"⚖️ Balanza simulada en tcp://{args.host}:{args.puerto} con pesos {args.pesos}")
+    try:
+        asyncio.run(servir_balanza(args.pesos, args.host, args.puerto, args.intervalo, not args.sin_estado))
+    except KeyboardInterrupt:
+        print("Balanza simulada detenida.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,21 @@
 # utils/cajas.py
+import json
 import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
 
 DATA_DIR = "data"
 CAJAS_FILE = os.path.join(DATA_DIR, "cajas.txt")
+HISTORIAL_CAJAS_FILE = os.path.join(DATA_DIR, "historial_cajas.json")
+
+DIMENSIONES = ["Alto(cm)", "Largo(cm)", "Ancho(cm)"]
+# Peso de la frecuencia histórica frente al ajuste de volumen (que va de -1 a 1)
+PESO_HISTORIAL = 2.0
+# Segundos tras los que un bloqueo del historial se considera abandonado
+# (un proceso que terminó sin soltarlo); guardar el historial toma milisegundos
+BLOQUEO_VENCIDO = 30
 
 def cargar_cajas():
     """
@@ -78,4 +91,201 @@ def eliminar_caja(cajas, codigo_caja):
             cajas.pop(i)
             guardar_cajas(cajas)
             return True
-    return False
\ No newline at end of file
+    return False
+
+
+def matriz_cajas(df_cajas):
+    """
+    Dimensiones del catálogo como matriz NumPy: una fila por caja (alto, largo, ancho),
+    en el mismo orden que df_cajas.
+    """
+    return df_cajas[DIMENSIONES].to_numpy(dtype=float)
+
+def volumen_caja(caja):
+    """
+    Volumen en cm³ de una fila del catálogo.
+    """
+    return float(caja["Alto(cm)"] * caja["Largo(cm)"] * caja["Ancho(cm)"])
+
+def clave_conjunto(coditems):
+    """
+    Clave del historial para un conjunto de CodItem (sin orden ni repetidos).
+    """
+    return "|".join(sorted({str(c) for c in coditems}))
+
+def cargar_historial_cajas():
+    """
+    Lee el historial de cajas elegidas:
+    conjuntos: {clave_conjunto: {CódigoCaja: veces elegida}}
+    vol_unidad: {CodItem: {promedio: cm³ de caja por unidad, n: elecciones}}
+    peso_unidad: {CodItem: {promedio: kg del bulto por unidad, n: bultos pesados}}
+    """
+    historial = {}
+    if os.path.exists(HISTORIAL_CAJAS_FILE):
+        with open(HISTORIAL_CAJAS_FILE, "r", encoding="utf-8") as f:
+            historial = json.load(f)
+    historial.setdefault("conjuntos", {})
+    historial.setdefault("vol_unidad", {})
+    historial.setdefault("peso_unidad", {})
+    return historial
+
+@contextmanager
+def bloqueo_historial():
+    """
+    Bloqueo entre procesos del historial de cajas, con un archivo .lock creado
+    de forma exclusiva. En un lote varios procesos terminan pedidos a la vez:
+    sin él, cada uno leería el historial, le sumaría sus cajas y al guardar
+    pisaría lo que sumaron los demás.
+    """
+    path = f"{HISTORIAL_CAJAS_FILE}.lock"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    while True:
+        try:
+            descriptor = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > BLOQUEO_VENCIDO:
+                    os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(descriptor)
+        os.remove(path)
+
+def guardar_historial_cajas(historial):
+    # Archivo temporal por proceso: en un lote varios procesos guardan el historial
+    temporal = f"{HISTORIAL_CAJAS_FILE}.{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(historial, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, HISTORIAL_CAJAS_FILE)
+
+def registrar_eleccion_caja(historial, coditems, unidades, codigo_caja, volumen_caja, peso=None):
+    """
+    Suma la caja elegida para un LPN al historial de su conjunto de CodItem y
+    actualiza el volumen y peso por unidad de cada CodItem (volumen de la caja
+    y peso del bulto repartidos entre todas las unidades del LPN).
+    :param coditems: CodItem del LPN (uno por fila del WMS)
+    :param unidades: Unidades de cada fila
+    :param codigo_caja: CódigoCaja elegido
+    :param volumen_caja: volumen de la caja en cm³
+    :param peso: peso real del bulto en kg, si se conoce
+    """
+    conteos = historial["conjuntos"].setdefault(clave_conjunto(coditems), {})
+    conteos[codigo_caja] = conteos.get(codigo_caja, 0) + 1
+
+    total_unidades = float(sum(unidades))
+    if total_unidades <= 0:
+        return
+    _sumar_promedio(historial["vol_unidad"], coditems, float(volumen_caja) / total_unidades)
+    if peso is not None:
+        _sumar_promedio(historial["peso_unidad"], coditems, float(peso) / total_unidades)
+
+def _sumar_promedio(tabla, coditems, valor):
+    # Promedio móvil por CodItem: no hace falta guardar cada valor
+    for coditem in {str(c) for c in coditems}:
+        dato = tabla.setdefault(coditem, {"promedio": 0.0, "n": 0})
+        dato["n"] += 1
+        dato["promedio"] += (valor - dato["promedio"]) / dato["n"]
+
+def _estimar_por_unidad(tabla, coditems, unidades):
+    """
+    Suma de unidades por el promedio por unidad de cada CodItem. Los CodItem
+    sin historial usan la mediana de los conocidos.
+    :return: estimación o None si la tabla está vacía
+    """
+    if not tabla:
+        return None
+    mediana = float(np.median([v["promedio"] for v in tabla.values()]))
+    return sum(
+        tabla.get(str(c), {}).get("promedio", mediana) * float(u)
+        for c, u in zip(coditems, unidades)
+    )
+
+def estimar_volumen(coditems, unidades, historial):
+    """
+    Volumen (cm³) estimado del contenido de un LPN según el volumen por unidad
+    de cada CodItem.
+    :return: volumen estimado o None si no hay historial de volumen
+    """
+    return _estimar_por_unidad(historial["vol_unidad"], coditems, unidades)
+
+def puntuar_cajas(matriz, frecuencia, volumen_estimado):
+    """
+    Puntaje de todas las cajas del catálogo para un LPN en una sola operación.
+    Suma la frecuencia histórica de cada caja y un ajuste de volumen: si el
+    contenido cabe, la fracción de la caja que ocupa (menos aire, más puntaje);
+    si no cabe, un valor negativo según cuánto le falta.
+    Acepta también varios LPN a la vez: frecuencia con una fila por LPN y
+    volumen_estimado como columna (n, 1); el resultado tiene una fila por LPN.
+    :param matriz: dimensiones del catálogo (ver matriz_cajas)
+    :param frecuencia: array con la fracción de veces que se eligió cada caja
+    :param volumen_estimado: volumen del contenido en cm³ o None
+    :return: array con un puntaje por caja
+    """
+    volumen = matriz.prod(axis=1)
+    if volumen_estimado is None:
+        ajuste = np.zeros(len(matriz))
+    else:
+        ajuste = np.where(
+            volumen >= volumen_estimado,
+            volumen_estimado / volumen,
+            volumen / volumen_estimado - 1,
+        )
+    return PESO_HISTORIAL * frecuencia + ajuste
+
+def recomendar_caja(df_cajas, matriz, coditems, unidades, historial):
+    """
+    Recomienda la caja del catálogo para un LPN según las cajas elegidas antes
+    para el mismo conjunto de CodItem y el volumen estimado de su contenido.
+    :param df_cajas: catálogo de cajas
+    :param matriz: matriz_cajas(df_cajas)
+    :param coditems: CodItem del LPN (uno por fila del WMS)
+    :param unidades: Unidades de cada fila
+    :param historial: ver cargar_historial_cajas
+    :return: posición de la caja en df_cajas, o None si no hay historial para recomendar
+    """
+    if len(df_cajas) == 0:
+        return None
+    conteos = historial["conjuntos"].get(clave_conjunto(coditems), {})
+    frecuencia = df_cajas["CódigoCaja"].map(conteos).fillna(0).to_numpy(dtype=float)
+    if frecuencia.any():
+        frecuencia /= frecuencia.sum()
+    volumen_estimado = estimar_volumen(coditems, unidades, historial)
+    if not frecuencia.any() and volumen_estimado is None:
+        return None
+    return int(np.argmax(puntuar_cajas(matriz, frecuencia, volumen_estimado)))
+
+def actualizar_historial_cajas(elecciones):
+    """
+    Suma al historial guardado las cajas de un pedido terminado. La lectura,
+    la suma y el guardado se hacen con el historial bloqueado.
+    :param elecciones: lista de (coditems, unidades, CódigoCaja, volumen de la caja, peso)
+    """
+    with bloqueo_historial():
+        historial = cargar_historial_cajas()
+        for coditems, unidades, codigo_caja, volumen_caja, peso in elecciones:
+            registrar_eleccion_caja(historial, coditems, unidades, codigo_caja, volumen_caja, peso)
+        guardar_historial_cajas(historial)
+
+def elecciones_de_bultos(df_wms, indice_lpn, lpns, bultos):
+    """
+    Arma las elecciones de caja de un pedido para actualizar_historial_cajas.
+    :param bultos: dict {LPN: bulto} de la sesión (con CódigoCaja y dimensiones)
+    """
+    # utils.comunes carga pandas; el menú de cajas no lo necesita
+    from utils.comunes import contenido_lpn
+
+    elecciones = []
+    for lpn in lpns:
+        bulto = bultos[lpn]
+        if "CódigoCaja" not in bulto:
+            continue
+        coditems, unidades = contenido_lpn(df_wms, indice_lpn, lpn)
+        volumen = float(bulto["Alto (cm)"] * bulto["Largo (cm)"] * bulto["Ancho (cm)"])
+        elecciones.append((coditems, unidades, bulto["CódigoCaja"], volumen, bulto["Peso (kg)"]))
+    return elecciones
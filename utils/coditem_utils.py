@@ -1,17 +1,138 @@
 import json
 import os
+import sqlite3
+from contextlib import closing
 
 CODITEM_DB_PATH = "data/coditem_db.json"
+CODITEM_SQLITE_PATH = "data/coditem_db.sqlite"
+
+CAMPOS = ["NomItem", "Material", "NItem", "NroParte"]
+
+# SQLite admite hasta 999 parámetros por consulta en versiones antiguas
+LOTE_CONSULTA = 900
+# Segundos que se espera a otro proceso del lote que está escribiendo o migrando
+ESPERA_BLOQUEO = 30
+
+
+def conectar():
+    """
+    Abre la base SQLite de CodItem, creando tablas e índices si no existen.
+    La primera vez importa el contenido de coditem_db.json.
+    """
+    conn = sqlite3.connect(CODITEM_SQLITE_PATH, timeout=ESPERA_BLOQUEO)
+    if conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+        # BEGIN IMMEDIATE toma el bloqueo de escritura antes de volver a mirar la
+        # versión: si dos procesos de un lote llegan a la vez, solo uno migra
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS coditems ("
+                    "CodItem TEXT PRIMARY KEY, NomItem TEXT, Material TEXT, NItem, NroParte TEXT)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_coditems_material ON coditems(Material)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_coditems_nroparte ON coditems(NroParte)")
+                if os.path.exists(CODITEM_DB_PATH):
+                    with open(CODITEM_DB_PATH, "r", encoding="utf-8") as f:
+                        _upsert(conn, json.load(f))
+                conn.execute("PRAGMA user_version = 1")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            conn.close()
+            raise
+    return conn
+
+
+def _fila_a_info(fila):
+    # Igual que en el JSON: los campos sin valor no aparecen en el dict
+    return {campo: valor for campo, valor in zip(CAMPOS, fila[1:]) if valor is not None}
+
+
+def _upsert(conn, db):
+    """
+    Inserta o actualiza CodItems. Solo se modifican los campos presentes en
+    cada dict, el resto conserva su valor guardado.
+    """
+    filas = [
+        (str(coditem), *(info.get(campo) for campo in CAMPOS))
+        for coditem, info in db.items()
+    ]
+    conn.executemany(
+        "INSERT INTO coditems (CodItem, NomItem, Material, NItem, NroParte) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(CodItem) DO UPDATE SET "
+        + ", ".join(f"{c} = COALESCE(excluded.{c}, {c})" for c in CAMPOS),
+        filas,
+    )
+
+
+def _consultar_en_lotes(columna, valores):
+    valores = list(dict.fromkeys(str(v) for v in valores))
+    with closing(conectar()) as conn:
+        for i in range(0, len(valores), LOTE_CONSULTA):
+            lote = valores[i:i + LOTE_CONSULTA]
+            marcas = ", ".join("?" * len(lote))
+            yield from conn.execute(
+                f"SELECT CodItem, {', '.join(CAMPOS)} FROM coditems WHERE {columna} IN ({marcas})",
+                lote,
+            )
+
+
+def obtener_coditems(coditems):
+    """
+    Busca varios CodItem en una sola consulta por lote.
+    :return: dict {CodItem: {NomItem, Material, NItem, NroParte}} solo con los encontrados
+    """
+    return {fila[0]: _fila_a_info(fila) for fila in _consultar_en_lotes("CodItem", coditems)}
+
+
+def buscar_por_material(materiales):
+    """
+    Busca CodItems por Material usando el índice de Material.
+    :return: dict {Material: (CodItem, info)} con el primer CodItem de cada Material
+    """
+    encontrados = {}
+    for fila in _consultar_en_lotes("Material", materiales):
+        info = _fila_a_info(fila)
+        encontrados.setdefault(info["Material"], (fila[0], info))
+    return encontrados
+
+
+def indice_material(materiales):
+    """
+    Índice Material -> (CodItem, NomItem) para armar guías.
+    Si el Material es a su vez un CodItem (Material por defecto) se usa ese
+    CodItem; si no, el primer CodItem cuyo Material coincide.
+    :return: dict {Material: (CodItem, NomItem)} solo con los encontrados
+    """
+    materiales = [str(m) for m in materiales]
+    indice = {
+        material: (coditem, info.get("NomItem", ""))
+        for material, (coditem, info) in buscar_por_material(materiales).items()
+    }
+    for coditem, info in obtener_coditems(materiales).items():
+        indice[coditem] = (coditem, info.get("NomItem", ""))
+    return indice
+
+
+def guardar_coditems(db):
+    """
+    Guarda en una sola transacción los CodItem de db ({CodItem: info}).
+    """
+    with closing(conectar()) as conn, conn:
+        _upsert(conn, db)
+
 
 def cargar_coditem_db():
-    if os.path.exists(CODITEM_DB_PATH):
-        with open(CODITEM_DB_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+    with closing(conectar()) as conn:
+        return {fila[0]: _fila_a_info(fila) for fila in conn.execute(
+            f"SELECT CodItem, {', '.join(CAMPOS)} FROM coditems"
+        )}
+
 
 def guardar_coditem_db(db):
-    with open(CODITEM_DB_PATH, "w", encoding="utf-8") as f:
-        json.dump(db, f, indent=2, ensure_ascii=False)
+    guardar_coditems(db)
+
 
 def validar_o_actualizar_material(coditem, nomitem):
     """
@@ -19,30 +140,27 @@ def validar_o_actualizar_material(coditem, nomitem):
     Si no existe o usuario indica que no es correcto, pide nuevo valor para Material.
     Retorna el valor final de Material guardado.
     """
-    db = cargar_coditem_db()
     coditem_str = str(coditem)
-    if coditem_str in db:
-        info = db[coditem_str]
+    info = obtener_coditems([coditem_str]).get(coditem_str)
+    if info is not None:
         material_guardado = info.get("Material", "")
         nomitem_guardado = info.get("NomItem", "")
         if nomitem_guardado != nomitem:
-            db[coditem_str]["NomItem"] = nomitem  # Actualiza nombre si cambió
+            guardar_coditems({coditem_str: {"NomItem": nomitem}})  # Actualiza nombre si cambió
         print(f"\nCodItem: {coditem} | NomItem: {nomitem}")
         print(f"Material guardado: {material_guardado}")
         correcto = input("¿Es correcto el Material? (s/n): ").strip().lower()
         if correcto != "s":
             nuevo_material = input("Ingrese nuevo Material: ").strip()
-            db[coditem_str]["Material"] = nuevo_material
-            guardar_coditem_db(db)
+            guardar_coditems({coditem_str: {"Material": nuevo_material}})
             return nuevo_material
         else:
             return material_guardado
     else:
         print(f"\nCodItem: {coditem} | NomItem: {nomitem}")
         nuevo_material = input("Ingrese Material: ").strip()
-        db[coditem_str] = {
+        guardar_coditems({coditem_str: {
             "Material": nuevo_material,
             "NomItem": nomitem
-        }
-        guardar_coditem_db(db)
-        return nuevo_material
\ No newline at end of file
+        }})
+        return nuevo_material
@@ -1,46 +1,70 @@
 # utils/comunes.py
+import numpy as np
 import pandas as pd
 
+CLAVES_CAJA = ["TipoCaja", "Alto (cm)", "Largo (cm)", "Ancho (cm)"]
+
+def _agrupar_pesos(pesos, tolerancia_peso):
+    """
+    Agrupa pesos ya ordenados de menor a mayor con un barrido lineal.
+    Cada grupo parte en el menor peso libre e incluye los pesos a no más de
+    tolerancia_peso de él, de modo que todos quedan dentro de la tolerancia.
+    :return: array con el número de grupo de cada peso
+    """
+    grupos = np.empty(len(pesos), dtype=np.int64)
+    inicio = 0
+    grupo = 0
+    while inicio < len(pesos):
+        fin = np.searchsorted(pesos, pesos[inicio] + tolerancia_peso, side="right")
+        grupos[inicio:fin] = grupo
+        inicio = fin
+        grupo += 1
+    return grupos
+
 def agrupar_cajas(df, tolerancia_peso=0.5):
     """
     Agrupa cajas similares según peso y dimensiones.
+    Las cajas se separan por TipoCaja y dimensiones exactas y, dentro de cada
+    grupo, se juntan los pesos que no difieren más de tolerancia_peso.
     :param df: DataFrame con columnas Peso (kg), TipoCaja, Alto (cm), Largo (cm), Ancho (cm)
     :param tolerancia_peso: diferencia máxima de peso para agrupar
     :return: DataFrame agrupado con columnas Tipo, Unidades, Peso(kg/unid), Alto(cm/unid), Ancho(cm/unid), Largo(cm/unid)
     """
-    agrupados = []
-    usados = set()
-
-    for i, row in df.iterrows():
-        if i in usados:
-            continue
-        grupo = [row]
-        usados.add(i)
-
-        for j, row2 in df.iterrows():
-            if j in usados or i == j:
-                continue
-            if (
-                abs(row["Peso (kg)"] - row2["Peso (kg)"]) <= tolerancia_peso and
-                row["TipoCaja"] == row2["TipoCaja"] and
-                row["Alto (cm)"] == row2["Alto (cm)"] and
-                row["Largo (cm)"] == row2["Largo (cm)"] and
-                row["Ancho (cm)"] == row2["Ancho (cm)"]
-            ):
-                grupo.append(row2)
-                usados.add(j)
-
-        promedio_peso = sum([x["Peso (kg)"] for x in grupo]) / len(grupo)
-        agrupados.append({
-            "Tipo": row["TipoCaja"],
-            "Unidades": len(grupo),
-            "Peso(kg/unid)": round(promedio_peso, 2),
-            "Alto(cm/unid)": row["Alto (cm)"],
-            "Ancho(cm/unid)": row["Ancho (cm)"],
-            "Largo(cm/unid)": row["Largo (cm)"]
-        })
-
-    return pd.DataFrame(agrupados)
+    columnas = ["Tipo", "Unidades", "Peso(kg/unid)", "Alto(cm/unid)", "Ancho(cm/unid)", "Largo(cm/unid)"]
+    if df.empty:
+        return pd.DataFrame(columns=columnas)
+
+    cajas = df[CLAVES_CAJA + ["Peso (kg)"]].reset_index(drop=True)
+    cajas["_orden"] = np.arange(len(cajas))
+    cajas["_clave"] = cajas.groupby(CLAVES_CAJA, sort=False, dropna=False, observed=True).ngroup()
+    cajas = cajas.sort_values(["_clave", "Peso (kg)"], kind="stable")
+
+    # Barrido por clave: los números de grupo se desplazan para no repetirse entre claves
+    pesos = cajas["Peso (kg)"].to_numpy(dtype=float)
+    claves = cajas["_clave"].to_numpy()
+    grupos = np.empty(len(cajas), dtype=np.int64)
+    limites = np.flatnonzero(np.diff(claves)) + 1
+    desplazamiento = 0
+    for inicio, fin in zip(np.r_[0, limites], np.r_[limites, len(cajas)]):
+        grupos[inicio:fin] = _agrupar_pesos(pesos[inicio:fin], tolerancia_peso) + desplazamiento
+        desplazamiento = grupos[fin - 1] + 1
+    cajas["_grupo"] = grupos
+
+    agrupados = cajas.groupby("_grupo").agg(
+        Tipo=("TipoCaja", "first"),
+        Unidades=("Peso (kg)", "size"),
+        Peso=("Peso (kg)", "mean"),
+        Alto=("Alto (cm)", "first"),
+        Ancho=("Ancho (cm)", "first"),
+        Largo=("Largo (cm)", "first"),
+        _orden=("_orden", "min"),
+    )
+    # Mantener el orden de aparición de las cajas en df
+    agrupados = agrupados.sort_values("_orden").reset_index(drop=True)
+    agrupados["Peso"] = agrupados["Peso"].round(2)
+    agrupados = agrupados.drop(columns="_orden")
+    agrupados.columns = columnas
+    return agrupados
 
 def validar_numero(valor):
     """
@@ -58,5 +82,46 @@ def agrupar_unidades_por_coditem(df):
     :param df: DataFrame con columnas CodItem, NomItem, Unidades
     :return: DataFrame con columnas CodItem, NomItem, Unidades (sumadas)
     """
-    agrupado = df.groupby(["CodItem", "NomItem"], as_index=False)["Unidades"].sum()
-    return agrupado
\ No newline at end of file
+    agrupado = df.groupby(["CodItem", "NomItem"], as_index=False, observed=True)["Unidades"].sum()
+    return agrupado
+
+def descartar_filas_sin_lpn(df):
+    """
+    Quita las filas del WMS con el LPN vacío, avisando cuántas son.
+    Se llama antes de indexar_lpns, que no indexa los LPN vacíos.
+    :return: df sin esas filas (el mismo df si no había ninguna)
+    """
+    vacias = df["LPN"].isna() | (df["LPN"].astype(str).str.strip() == "")
+    if not vacias.any():
+        return df
+    print(f"⚠️ Se omiten {int(vacias.sum())} filas del WMS sin LPN.")
+    return df[~vacias].reset_index(drop=True)
+
+def indexar_lpns(df):
+    """
+    Índice LPN -> posiciones de sus filas en df, armado una sola vez por pedido.
+    Reemplaza los filtros df[df["LPN"] == lpn] dentro de loops por LPN.
+    Las filas sin LPN no quedan en el índice (ver descartar_filas_sin_lpn).
+    :param df: DataFrame con columna LPN
+    :return: dict {LPN: array de posiciones para df.iloc}
+    """
+    return df.groupby("LPN", sort=False, observed=True).indices
+
+def filas_de_lpns(df, indice, lpns):
+    """
+    Devuelve las filas de varios LPN, agrupadas en el orden de lpns.
+    :param df: DataFrame con que se armó el índice
+    :param indice: resultado de indexar_lpns(df)
+    :param lpns: lista de LPN
+    """
+    if not lpns:
+        return df.iloc[:0]
+    return df.iloc[np.concatenate([indice[lpn] for lpn in lpns])]
+
+def contenido_lpn(df, indice, lpn):
+    """
+    CodItem y Unidades de las filas de un LPN.
+    :return: (lista de CodItem como texto, lista de Unidades)
+    """
+    filas = df.iloc[indice[lpn]]
+    return filas["CodItem"].astype(str).tolist(), filas["Unidades"].tolist()
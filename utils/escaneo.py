@@ -0,0 +1,149 @@
+# utils/escaneo.py
+import re
+
+# Las pistolas de código de barras escriben como un teclado y terminan con Enter;
+# algunas agregan caracteres de control o el identificador AIM (ej. ']C1')
+PATRON_CONTROL = re.compile(r"[\x00-\x1f\x7f]")
+PATRON_AIM = re.compile(r"^\][A-Za-z]\d")
+SALIR = "SALIR"
+
+
+def normalizar_codigo(texto):
+    """
+    Deja el código leído sin espacios, caracteres de control ni prefijo AIM, en mayúsculas.
+    """
+    codigo = PATRON_CONTROL.sub("", str(texto)).strip()
+    return PATRON_AIM.sub("", codigo).upper()
+
+
+def crear_seguimiento(lpns, listos=()):
+    """
+    Estado del escaneo de un pedido.
+    posicion: índice código -> posición del LPN en lpns
+    listos: LPN ya registrados
+    siguiente: posición del primer LPN pendiente según el orden de lpns
+    pendientes: cantidad de LPN sin registrar
+    :param lpns: LPN del pedido en el orden esperado
+    :param listos: LPN ya registrados antes (por ejemplo en una sesión retomada)
+    """
+    lpns = list(lpns)
+    listos = set(listos)
+    seguimiento = {
+        "lpns": lpns,
+        "posicion": {normalizar_codigo(lpn): i for i, lpn in enumerate(lpns)},
+        "listos": {lpn for lpn in lpns if lpn in listos},
+        "siguiente": 0,
+    }
+    seguimiento["pendientes"] = len(lpns) - len(seguimiento["listos"])
+    _avanzar(seguimiento)
+    return seguimiento
+
+
+def _avanzar(seguimiento):
+    # Cada posición se salta una sola vez en todo el pedido
+    lpns = seguimiento["lpns"]
+    while seguimiento["siguiente"] < len(lpns) and lpns[seguimiento["siguiente"]] in seguimiento["listos"]:
+        seguimiento["siguiente"] += 1
+
+
+def clasificar_escaneo(seguimiento, codigo):
+    """
+    Clasifica un código escaneado sin recorrer el pedido.
+    :return: (tipo, lpn) con tipo 'desconocido', 'repetido', 'fuera_de_orden' o 'esperado'
+    """
+    posicion = seguimiento["posicion"].get(normalizar_codigo(codigo))
+    if posicion is None:
+        return "desconocido", None
+    lpn = seguimiento["lpns"][posicion]
+    if lpn in seguimiento["listos"]:
+        return "repetido", lpn
+    if posicion != seguimiento["siguiente"]:
+        return "fuera_de_orden", lpn
+    return "esperado", lpn
+
+
+def marcar_listo(seguimiento, lpn):
+    if lpn not in seguimiento["listos"]:
+        seguimiento["listos"].add(lpn)
+        seguimiento["pendientes"] -= 1
+        _avanzar(seguimiento)
+
+
+def imprimir_progreso(seguimiento):
+    total = len(seguimiento["lpns"])
+    hechos = total - seguimiento["pendientes"]
+    porcentaje = hechos / total if total else 1
+    print(f"📊 Progreso: {hechos}/{total} LPN ({porcentaje:.0%}), faltan {seguimiento['pendientes']}")
+
+
+def imprimir_pendientes(seguimiento):
+    pendientes = [lpn for lpn in seguimiento["lpns"] if lpn not in seguimiento["listos"]]
+    print(f"\n📋 LPN pendientes ({len(pendientes)}): {' '.join(map(str, pendientes))}")
+
+
+def escanear_lpns(lpns, listos, procesar):
+    """
+    Modo escaneo: el operador escanea cada LPN en el orden en que llegan las
+    cajas y se abre de inmediato su registro. Enter sin código muestra los
+    LPN pendientes; 'salir' termina sin completar el pedido.
+    :param lpns: LPN del pedido en el orden esperado
+    :param listos: LPN ya registrados (por ejemplo de una sesión retomada)
+    :param procesar: función(lpn) -> True si el LPN quedó registrado, False si
+                     se volvió atrás (se puede escanear de nuevo) o None para salir
+    :return: True al completar todos los LPN, None si el operador sale
+    """
+    seguimiento = crear_seguimiento(lpns, listos)
+    imprimir_progreso(seguimiento)
+    while seguimiento["pendientes"]:
+        codigo = normalizar_codigo(input("\n🔎 Escanee LPN (Enter: ver pendientes, 'salir' para terminar): "))
+        if codigo == SALIR:
+            return None
+        if not codigo:
+            imprimir_pendientes(seguimiento)
+            continue
+
+        tipo, lpn = clasificar_escaneo(seguimiento, codigo)
+        if tipo == "desconocido":
+            print(f"❌ El código {codigo} no es un LPN de este pedido.")
+            continue
+        if tipo == "repetido":
+            print(f"⚠️ El LPN {lpn} ya fue registrado.")
+            continue
+        if tipo == "fuera_de_orden":
+            print(f"↪️ LPN {lpn} fuera de orden (se esperaba {seguimiento['lpns'][seguimiento['siguiente']]}).")
+
+        resultado = procesar(lpn)
+        if resultado is None:
+            return None
+        if resultado:
+            marcar_listo(seguimiento, lpn)
+            imprimir_progreso(seguimiento)
+    return True
+
+
+def escanear_pallet(disponibles):
+    """
+    Arma un pallet escaneando sus LPN. Enter sin código cierra el pallet;
+    'salir' cancela.
+    :param disponibles: LPN que todavía no están en otro pallet
+    :return: lista de LPN escaneados en orden, o None si el operador sale
+    """
+    indice = {normalizar_codigo(lpn): lpn for lpn in disponibles}
+    elegidos = {}
+    while True:
+        codigo = normalizar_codigo(input(f"🔎 Escanee LPN del pallet ({len(elegidos)} escaneados, Enter para cerrar): "))
+        if codigo == SALIR:
+            return None
+        if not codigo:
+            if elegidos:
+                return list(elegidos)
+            print("❌ Debes escanear al menos un LPN.")
+            continue
+        lpn = indice.get(codigo)
+        if lpn is None:
+            print(f"❌ El código {codigo} no es un LPN disponible para este pallet.")
+        elif lpn in elegidos:
+            print(f"⚠️ El LPN {lpn} ya está en este pallet.")
+        else:
+            elegidos[lpn] = True
+            print(f"✅ {lpn}")
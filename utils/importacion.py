@@ -0,0 +1,196 @@
+# utils/importacion.py
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from utils.plantillas import escribir_plantilla
+from utils.rutas import IMPORTACION_DB, resource_path, ruta_en_salida
+from utils.telemetria import etapa
+
+CLIENT_DB = os.path.join("data", "client_db.json")
+
+# Un carácter UTF-8 de varios bytes leído como latin1 queda como un byte
+# inicial (Â-ô) seguido de un byte de continuación (\x80-¿). Un texto sin
+# ese par no es UTF-8 válido fuera de ASCII y clean_text lo deja igual.
+PATRON_MOJIBAKE = "[\xc2-\xf4][\x80-\xbf]"
+
+
+def cargar_importaciones():
+    """
+    Lee data/importacion_db.json y devuelve dict {cliente: spec}.
+    Cada spec es el formato base del cliente con sus propias claves encima.
+    """
+    path = resource_path(IMPORTACION_DB)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        db = json.load(f)
+    formatos = db.get("Formatos", {})
+    specs = {}
+    for cliente, config in db.get("Clientes", {}).items():
+        spec = dict(formatos.get(config.get("formato"), {}))
+        spec.update(config)
+        spec["nombre"] = cliente
+        specs[cliente] = spec
+    return specs
+
+
+def compilar_importacion(cliente):
+    """
+    Arma el proceso de importación de un cliente a partir de su spec.
+    Devuelve un objeto con run(df_wms, df_cajas) y COLUMNAS_WMS, igual que
+    un módulo de clientes/, o None si el cliente no tiene spec.
+    """
+    spec = cargar_importaciones().get(cliente)
+    if spec is None:
+        return None
+
+    renombrar = spec["renombrar"]
+    texto = spec.get("texto", [])
+    fechas = spec.get("fechas", [])
+    unidades_logisticas = spec.get("unidades_logisticas")
+
+    columnas_wms = {col: ("str" if col in texto or col in fechas else None) for col in renombrar}
+    if unidades_logisticas:
+        columnas_wms[unidades_logisticas] = None
+
+    def run(df_wms, df_cajas):
+        return ejecutar_importacion(spec, df_wms)
+
+    return SimpleNamespace(run=run, COLUMNAS_WMS=columnas_wms, SPEC=spec)
+
+
+def clean_text(s):
+    if pd.isna(s):
+        return ""
+    try:
+        return s.encode('latin1').decode('utf-8')
+    except Exception:
+        return s
+
+
+def reparar_texto(serie):
+    """
+    Repara textos UTF-8 que se leyeron como latin1 (ej. 'RazÃ³n' -> 'Razón').
+    Se trabaja sobre los valores distintos de la columna, porque columnas como
+    Razón social repiten el mismo texto en todas las filas, y solo se
+    decodifican los que contienen una secuencia mal leída.
+    """
+    codigos, unicos = pd.factorize(serie.astype(str))
+    unicos = pd.Series(unicos, dtype=object)
+    sospechosos = unicos.str.contains(PATRON_MOJIBAKE, regex=True)
+    if sospechosos.any():
+        unicos[sospechosos] = unicos[sospechosos].map(clean_text)
+    return pd.Series(unicos.to_numpy()[codigos], index=serie.index, name=serie.name)
+
+
+def normalizar_fechas(serie, formatos, formato_salida):
+    """
+    Convierte una columna de fechas al texto formato_salida en una sola pasada.
+    Cada fecha distinta se interpreta una sola vez, probando los formatos en
+    orden; las fechas numéricas se toman como serial de Excel y lo que no calce
+    con ningún formato se interpreta con día primero. Las fechas inválidas
+    quedan como None.
+    :param serie: columna de fechas (texto, datetime o serial de Excel)
+    :param formatos: lista de formatos strptime a probar, ej. ["%d-%m-%Y"]
+    :param formato_salida: formato strftime del resultado, ej. "%Y%m%d"
+    """
+    codigos, unicos = pd.factorize(serie)
+    if pd.api.types.is_datetime64_any_dtype(unicos):
+        fechas = pd.DatetimeIndex(unicos)
+    elif pd.api.types.is_numeric_dtype(unicos):
+        fechas = pd.to_datetime(unicos, unit="D", origin="1899-12-30", errors="coerce")
+    else:
+        textos = pd.Index(unicos).astype(str).str.strip()
+        fechas = pd.Series(pd.NaT, index=range(len(textos)), dtype="datetime64[ns]")
+        for formato in formatos:
+            pendientes = fechas.isna().to_numpy()
+            if not pendientes.any():
+                break
+            fechas[pendientes] = pd.to_datetime(textos[pendientes], format=formato, errors="coerce")
+        pendientes = fechas.isna().to_numpy()
+        if pendientes.any():
+            fechas[pendientes] = pd.to_datetime(textos[pendientes], format="mixed", dayfirst=True, errors="coerce")
+        fechas = pd.DatetimeIndex(fechas)
+
+    salida = fechas.strftime(formato_salida).to_numpy(dtype=object)
+    salida[fechas.isna()] = None
+    resultado = salida[codigos] if len(salida) else np.full(len(codigos), None, dtype=object)
+    resultado[codigos == -1] = None
+    return pd.Series(resultado, index=serie.index, name=serie.name)
+
+
+def limpiar_consola():
+    os.system('cls' if os.name == 'nt' else 'clear')
+
+
+def ejecutar_importacion(spec, df_wms):
+    """
+    Genera el archivo de importación de una OC según la spec del cliente:
+    repara textos, normaliza fechas, renombra columnas, agrega constantes y
+    datos del cliente y escribe el resultado sobre la plantilla.
+    """
+    limpiar_consola()
+    orden_salida = input("Ingrese orden_salida: ").strip()
+
+    with open(resource_path(CLIENT_DB), "r", encoding="utf-8") as f:
+        clientes = json.load(f)
+    cliente_sel = clientes[spec["cliente_db"]]
+
+    for col in spec["renombrar"]:
+        if col not in df_wms.columns:
+            print(f"❌ Columna '{col}' no encontrada en el archivo CSV.")
+            return
+
+    df = df_wms.copy()
+
+    with etapa("reparar_texto", filas=len(df)):
+        for col in spec.get("texto", []):
+            df[col] = reparar_texto(df[col])
+
+    formatos = spec.get("formatos_fecha", [])
+    formato_salida = spec.get("formato_fecha_salida", "%Y%m%d")
+    with etapa("fechas", filas=len(df)):
+        for col in spec.get("fechas", []):
+            df[col] = normalizar_fechas(df[col], formatos, formato_salida)
+
+    referencia = df[spec["referencia"]].dropna()
+    nro_referencia = str(referencia.iloc[0]).strip() if not referencia.empty else ""
+
+    df.rename(columns=spec["renombrar"], inplace=True)
+
+    for col, valor in spec.get("constantes", {}).items():
+        df[col] = valor
+    for col, campo in spec.get("desde_cliente", {}).items():
+        df[col] = cliente_sel.get(campo, "")
+    df['NroReferencia'] = nro_referencia
+    df['NroOrdenSalida'] = orden_salida
+
+    df_final = df[spec["columnas_finales"]].copy()
+
+    # Calcular cantidad de bultos (cajas) y total unidades
+    unidades_logisticas = spec.get("unidades_logisticas")
+    if unidades_logisticas and unidades_logisticas in df.columns:
+        cantidad = df_final['CantidadSolicitada'].astype(float)
+        bultos = cantidad / df[unidades_logisticas].astype(float)
+        print(f"Cantidad Bultos: {bultos.sum():.0f} - Cantidad Unidades: {cantidad.sum():.0f}")
+    elif unidades_logisticas:
+        print(f"❌ No se encontró la columna '{unidades_logisticas}' para calcular bultos.")
+
+    # La plantilla se lee de su ubicación base y el resultado va a la carpeta de
+    # salida configurada (la misma plantilla si no se cambió la carpeta)
+    type_path = spec["plantilla"]
+    destino = ruta_en_salida(spec["plantilla"])
+
+    if os.path.exists(type_path):
+        columnas_fecha = [spec["renombrar"][col] for col in spec.get("fechas", [])]
+        with etapa("plantilla", filas=len(df_final)):
+            escribir_plantilla(type_path, destino, df_final, columnas_general=columnas_fecha)
+        print(f"✅ Archivo importar {spec['nombre']} Generado Correctamente.")
+    else:
+        print(f"❌ No se encontró el archivo de formato {type_path}. Se genera sin formato especial.")
+        df_final.to_excel(destino, index=False, sheet_name='Sheet1')
+        print(f"✅ Archivo generado en: {destino}")
@@ -0,0 +1,161 @@
+# utils/lote.py
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime
+
+from utils.balanza import VARIABLE_BALANZA
+from utils.rutas import VARIABLE_SALIDA, directorio_salida
+
+CAMPOS_TRABAJO = ("owner", "client", "wms")
+
+
+def cargar_manifiesto(path):
+    """
+    Lee el manifiesto de un lote: una lista de trabajos o un dict con la clave
+    "trabajos". Cada trabajo es un dict con owner, client, wms y opcionalmente
+    answers (ruta a un JSON o la lista de respuestas) y nombre.
+    Las rutas relativas se toman desde la carpeta del manifiesto.
+    :return: lista de trabajos con rutas absolutas y nombre
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        datos = json.load(f)
+    if isinstance(datos, dict):
+        datos = datos.get("trabajos", [])
+    if not isinstance(datos, list):
+        raise ValueError(f"El manifiesto {path} debe contener una lista de trabajos.")
+
+    base = os.path.dirname(os.path.abspath(path))
+    trabajos = []
+    for num, trabajo in enumerate(datos, 1):
+        faltan = [campo for campo in CAMPOS_TRABAJO if not trabajo.get(campo)]
+        if faltan:
+            raise ValueError(f"El trabajo {num} del manifiesto no tiene {', '.join(faltan)}.")
+        trabajo = dict(trabajo)
+        trabajo["wms"] = os.path.join(base, trabajo["wms"])
+        if isinstance(trabajo.get("answers"), str):
+            trabajo["answers"] = os.path.join(base, trabajo["answers"])
+        nombre = trabajo.get("nombre") or f"{trabajo['client']}_{os.path.splitext(os.path.basename(trabajo['wms']))[0]}"
+        trabajo["nombre"] = f"{num:03d}_{nombre}"
+        trabajos.append(trabajo)
+    return trabajos
+
+
+def ejecutar_trabajo(ejecutar, trabajo, directorio):
+    """
+    Ejecuta un trabajo del lote en el proceso actual. Los resultados van a su
+    propia carpeta y todo lo que imprime el cliente queda en salida.log.
+    :param ejecutar: función(owner, cliente, wms, respuestas) -> código de salida
+    :param directorio: carpeta de salida del trabajo
+    :return: dict con el estado y la duración del trabajo
+    """
+    os.makedirs(directorio, exist_ok=True)
+    os.environ[VARIABLE_SALIDA] = directorio
+    # Los pesos vienen en las respuestas; no se espera una balanza
+    os.environ[VARIABLE_BALANZA] = "teclado"
+
+    respuestas = trabajo.get("answers")
+    if isinstance(respuestas, list):
+        path = os.path.join(directorio, "respuestas.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(respuestas, f, ensure_ascii=False)
+        respuestas = path
+
+    error = None
+    inicio = time.perf_counter()
+    with open(os.path.join(directorio, "salida.log"), "w", encoding="utf-8") as log:
+        with redirect_stdout(log), redirect_stderr(log):
+            try:
+                codigo = ejecutar(trabajo["owner"], trabajo["client"], trabajo["wms"], respuestas)
+            except Exception as e:
+                traceback.print_exc()
+                codigo, error = 1, f"{type(e).__name__}: {e}"
+    if codigo != 0 and error is None:
+        error = ultimo_error(os.path.join(directorio, "salida.log"))
+    return {
+        "nombre": trabajo["nombre"],
+        "owner": trabajo["owner"],
+        "cliente": trabajo["client"],
+        "wms": trabajo["wms"],
+        "estado": "ok" if codigo == 0 else "error",
+        "codigo": codigo,
+        "error": error,
+        "segundos": round(time.perf_counter() - inicio, 3),
+        "salida": directorio,
+    }
+
+
+def ultimo_error(path_log):
+    """
+    Último mensaje de error ("❌ ...") que imprimió un trabajo, para el resumen.
+    """
+    error = None
+    with open(path_log, "r", encoding="utf-8") as f:
+        for linea in f:
+            if linea.startswith("❌"):
+                error = linea[1:].strip()
+    return error
+
+
+def ejecutar_lote(trabajos, ejecutar, procesos=None):
+    """
+    Ejecuta los trabajos en un pool de procesos, cada uno con su carpeta
+    dentro de lotes/lote_<fecha>, y escribe resumen.json en la carpeta del lote.
+    :param trabajos: lista de cargar_manifiesto
+    :param ejecutar: función de nivel de módulo (se envía a otros procesos)
+    :param procesos: cantidad de procesos; por defecto uno por núcleo
+    :return: lista de resultados en el orden del manifiesto
+    """
+    fecha = datetime.now()
+    carpeta = os.path.abspath(os.path.join(directorio_salida(), "lotes", f"lote_{fecha:%Y%m%d_%H%M%S}"))
+    os.makedirs(carpeta, exist_ok=True)
+    procesos = max(1, min(procesos or os.cpu_count() or 1, len(trabajos)))
+
+    print(f"🚚 Lote de {len(trabajos)} trabajos en {procesos} procesos -> {carpeta}")
+    inicio = time.perf_counter()
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = {
+            pool.submit(ejecutar_trabajo, ejecutar, trabajo, os.path.join(carpeta, trabajo["nombre"])): trabajo
+            for trabajo in trabajos
+        }
+        for futuro in as_completed(futuros):
+            trabajo = futuros[futuro]
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                # El proceso del trabajo murió (ej. sin memoria)
+                resultado = {
+                    "nombre": trabajo["nombre"], "owner": trabajo["owner"], "cliente": trabajo["client"],
+                    "wms": trabajo["wms"], "estado": "error", "codigo": None,
+                    "error": f"{type(e).__name__}: {e}", "segundos": None, "salida": None,
+                }
+            icono = "✅" if resultado["estado"] == "ok" else "❌"
+            print(f"{icono} {resultado['nombre']} ({resultado['segundos']} s)")
+            resultados[trabajo["nombre"]] = resultado
+
+    resultados = [resultados[trabajo["nombre"]] for trabajo in trabajos]
+    resumen = {
+        "inicio": fecha.isoformat(timespec="seconds"),
+        "procesos": procesos,
+        "segundos": round(time.perf_counter() - inicio, 3),
+        "ok": sum(r["estado"] == "ok" for r in resultados),
+        "error": sum(r["estado"] != "ok" for r in resultados),
+        "trabajos": resultados,
+    }
+    with open(os.path.join(carpeta, "resumen.json"), "w", encoding="utf-8") as f:
+        json.dump(resumen, f, ensure_ascii=False, indent=2)
+    imprimir_resumen(resumen)
+    return resultados
+
+
+def imprimir_resumen(resumen):
+    print(f"\n{'Trabajo':<40} {'Estado':<7} {'Segundos':>9}")
+    print("-" * 58)
+    for r in resumen["trabajos"]:
+        segundos = "-" if r["segundos"] is None else f"{r['segundos']:.2f}"
+        print(f"{r['nombre']:<40} {r['estado']:<7} {segundos:>9}")
+    print(f"\n📋 {resumen['ok']} ok, {resumen['error']} con error en {resumen['segundos']:.2f} s")
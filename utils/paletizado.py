@@ -0,0 +1,175 @@
+# utils/paletizado.py
+import math
+
+import numpy as np
+import pandas as pd
+
+from utils.cajas import cargar_historial_cajas, clave_conjunto, matriz_cajas, puntuar_cajas
+from utils.comunes import filas_de_lpns
+
+# Base de pallet estándar (cm) y fracción del volumen que se logra ocupar al apilar cajas
+BASE_PALLET = (120, 100)
+FACTOR_LLENADO = 0.85
+
+
+def asignar_pallets(volumenes, pesos, cap_volumen, cap_peso, mejor_ajuste=False, altos=None, cap_alto=None):
+    """
+    Reparte bultos en pallets (bin packing en volumen y peso) por orden decreciente.
+    Los bultos se ordenan por la mayor fracción que ocupan de la capacidad de
+    volumen o de peso y cada uno va al pallet abierto donde cabe: el de menor
+    volumen libre (mejor ajuste) o el primero (first-fit). Si no cabe en
+    ninguno se abre un pallet nuevo.
+    :param volumenes: array de volumen de cada bulto (cm³)
+    :param pesos: array de peso de cada bulto (kg)
+    :param cap_volumen: volumen útil de un pallet (cm³)
+    :param cap_peso: peso máximo de un pallet (kg)
+    :param mejor_ajuste: True elige el pallet de menor volumen libre en vez del primero
+    :param altos: array de altura de cada bulto (cm); los más altos que cap_alto no se asignan
+    :param cap_alto: altura máxima de carga de un pallet (cm)
+    :return: array con el número de pallet (desde 0) de cada bulto; -1 si el
+             bulto solo ya excede la capacidad de un pallet
+    """
+    volumenes = np.asarray(volumenes, dtype=float)
+    pesos = np.asarray(pesos, dtype=float)
+    n = len(volumenes)
+    asignacion = np.full(n, -1, dtype=np.int64)
+    no_cabe = (volumenes > cap_volumen) | (pesos > cap_peso)
+    if altos is not None and cap_alto is not None:
+        no_cabe |= np.asarray(altos, dtype=float) > cap_alto
+
+    # Capacidad libre de cada pallet; como mucho hay un pallet por bulto
+    libre_vol = np.empty(n)
+    libre_peso = np.empty(n)
+    abiertos = 0
+
+    orden = np.argsort(-np.maximum(volumenes / cap_volumen, pesos / cap_peso), kind="stable")
+    for i in orden:
+        if no_cabe[i]:
+            continue
+        v, p = volumenes[i], pesos[i]
+        caben = np.flatnonzero((libre_vol[:abiertos] >= v) & (libre_peso[:abiertos] >= p))
+        if len(caben) == 0:
+            destino = abiertos
+            libre_vol[destino] = cap_volumen
+            libre_peso[destino] = cap_peso
+            abiertos += 1
+        elif mejor_ajuste:
+            destino = caben[np.argmin(libre_vol[caben])]
+        else:
+            destino = caben[0]
+        libre_vol[destino] -= v
+        libre_peso[destino] -= p
+        asignacion[i] = destino
+    return asignacion
+
+
+def cota_inferior(volumenes, pesos, cap_volumen, cap_peso):
+    """
+    Mínimo teórico de pallets: ningún reparto puede usar menos.
+    """
+    return max(
+        math.ceil(float(np.sum(volumenes)) / cap_volumen),
+        math.ceil(float(np.sum(pesos)) / cap_peso),
+    )
+
+
+def estimar_bultos(df_wms, indice_lpn, lpns, df_cajas):
+    """
+    Volumen, peso y altura estimados de cada LPN para armar pallets antes de pesar.
+    El volumen y la altura son los de la caja recomendada (o la mediana del
+    catálogo si no hay historial); el peso sale del peso por unidad del historial.
+    Se calcula para todos los LPN a la vez: una fila de puntajes por LPN.
+    :return: (array de volúmenes en cm³, array de pesos en kg o None si no hay
+             historial de pesos, array de alturas en cm)
+    """
+    historial = cargar_historial_cajas()
+    matriz = matriz_cajas(df_cajas)
+    volumen_catalogo = matriz.prod(axis=1)
+    volumen_defecto = float(np.median(volumen_catalogo)) if len(volumen_catalogo) else 0.0
+    alto_defecto = float(np.median(matriz[:, 0])) if len(matriz) else 0.0
+
+    filas = filas_de_lpns(df_wms, indice_lpn, lpns)
+    bulto = np.repeat(np.arange(len(lpns)), [len(indice_lpn[lpn]) for lpn in lpns])
+    coditems = filas["CodItem"].astype(str).reset_index(drop=True)
+    unidades = filas["Unidades"].to_numpy(dtype=float)
+
+    volumen_estimado = _sumar_por_unidad(historial["vol_unidad"], coditems, unidades, bulto, len(lpns))
+    peso_estimado = _sumar_por_unidad(historial["peso_unidad"], coditems, unidades, bulto, len(lpns))
+
+    if len(matriz) == 0:
+        # Sin catálogo no se conoce la altura de las cajas: no se limita por caja
+        volumenes = volumen_estimado if volumen_estimado is not None else np.zeros(len(lpns))
+        return volumenes, peso_estimado, np.zeros(len(lpns))
+
+    # Frecuencia histórica de cada caja por conjunto de CodItem, una fila por LPN
+    claves = coditems.groupby(bulto).agg(clave_conjunto)
+    codigos, unicas = pd.factorize(claves)
+    frecuencias = np.array([
+        df_cajas["CódigoCaja"].map(historial["conjuntos"].get(clave, {})).fillna(0).to_numpy(dtype=float)
+        for clave in unicas
+    ]).reshape(len(unicas), len(matriz))
+    totales = frecuencias.sum(axis=1, keepdims=True)
+    frecuencias = np.divide(frecuencias, totales, out=np.zeros_like(frecuencias), where=totales > 0)[codigos]
+
+    puntajes = puntuar_cajas(
+        matriz, frecuencias, None if volumen_estimado is None else volumen_estimado[:, None]
+    )
+    recomendada = np.argmax(puntajes, axis=1)
+    con_recomendacion = frecuencias.any(axis=1) | (volumen_estimado is not None)
+    volumenes = np.where(con_recomendacion, volumen_catalogo[recomendada], volumen_defecto)
+    altos = np.where(con_recomendacion, matriz[recomendada, 0], alto_defecto)
+    return volumenes, peso_estimado, altos
+
+
+def _sumar_por_unidad(tabla, coditems, unidades, bulto, n):
+    """
+    Suma por LPN de unidades por el promedio por unidad de cada CodItem
+    (mediana de los conocidos para los CodItem sin historial).
+    :return: array con un valor por LPN, o None si la tabla está vacía
+    """
+    if not tabla:
+        return None
+    promedios = pd.Series({c: v["promedio"] for c, v in tabla.items()}, dtype=float)
+    por_unidad = coditems.map(promedios).fillna(promedios.median()).to_numpy()
+    return np.bincount(bulto, weights=por_unidad * unidades, minlength=n)
+
+
+def proponer_pallets(df_wms, indice_lpn, lpns, df_cajas, peso_max, alto_max):
+    """
+    Propone el reparto de LPN en pallets para un peso y altura máximos.
+    Las cajas más altas que alto_max quedan fuera. Sin historial de pesos por
+    unidad el reparto es solo por volumen y se avisa que el peso no se controla.
+    :param lpns: LPN a paletizar, en el orden en que se muestran
+    :param peso_max: peso máximo por pallet (kg)
+    :param alto_max: altura máxima de carga por pallet (cm)
+    :return: lista de pallets, cada uno dict con LPNs, Peso estimado (kg) y
+             Ocupación (fracción del volumen útil); más la lista de LPN que no caben
+    """
+    cap_volumen = BASE_PALLET[0] * BASE_PALLET[1] * alto_max * FACTOR_LLENADO
+    volumenes, pesos, altos = estimar_bultos(df_wms, indice_lpn, lpns, df_cajas)
+    if pesos is None:
+        print("⚠️ No hay historial de pesos por unidad: la propuesta solo considera volumen y "
+              f"altura, sin controlar el peso máximo de {peso_max:g} kg. Revise el peso al pesar los pallets.")
+        pesos = np.zeros(len(lpns))
+    asignacion = asignar_pallets(volumenes, pesos, cap_volumen, peso_max, altos=altos, cap_alto=alto_max)
+
+    lpns = np.asarray(lpns, dtype=object)
+    propuesta = []
+    for pallet in range(asignacion.max(initial=-1) + 1):
+        en_pallet = asignacion == pallet
+        propuesta.append({
+            "LPNs": lpns[en_pallet].tolist(),
+            "Peso estimado (kg)": float(pesos[en_pallet].sum()),
+            "Ocupación": float(volumenes[en_pallet].sum() / cap_volumen),
+        })
+    return propuesta, lpns[asignacion == -1].tolist()
+
+
+def imprimir_propuesta(propuesta, sin_pallet):
+    print("\n🤖 Propuesta de pallets:")
+    print(f"{'Pallet':<10} {'LPNs':>6} {'Peso est. (kg)':>15} {'Ocupación':>10}")
+    print("-" * 45)
+    for num, p in enumerate(propuesta, 1):
+        print(f"{'Pallet' + str(num):<10} {len(p['LPNs']):>6} {p['Peso estimado (kg)']:>15.1f} {p['Ocupación']:>10.0%}")
+    if sin_pallet:
+        print(f"⚠️ {len(sin_pallet)} LPN no caben en un pallet y quedan como bultos: {' '.join(sin_pallet)}")
@@ -0,0 +1,102 @@
+# utils/perfilado.py
+import cProfile
+import io
+import pstats
+import tracemalloc
+from datetime import datetime
+
+from utils.rutas import ruta_salida
+from utils.telemetria import observar_etapas
+
+# Cantidad de funciones y líneas que se muestran en el reporte
+TOP = 30
+PERFILES_DIR = "perfiles"
+
+
+def ejecutar_perfilado(cliente, funcion, *args, top=TOP):
+    """
+    Ejecuta funcion(*args) con cProfile y tracemalloc y deja en output/perfiles/
+    el .prof (para snakeviz o pstats) y un reporte de texto con las funciones
+    más lentas y las líneas que más memoria asignan. El reporte se escribe
+    aunque la función termine con error.
+    La memoria se fotografía al entrar y salir de cada etapa de telemetría cada
+    vez que alcanza un nuevo máximo; el reporte muestra lo asignado entre el
+    inicio y la foto más alta, que es la más cercana al pico.
+    :return: lo que retorne la función
+    """
+    base = f"{cliente.lower()}_{datetime.now():%Y%m%d_%H%M%S}"
+    path_prof = ruta_salida(PERFILES_DIR, f"{base}.prof")
+    path_reporte = ruta_salida(PERFILES_DIR, f"{base}_reporte.txt")
+
+    ya_activo = tracemalloc.is_tracing()
+    if not ya_activo:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    inicial = tracemalloc.take_snapshot()
+    maximo = {"memoria": 0, "snapshot": inicial, "momento": "inicio de la corrida", "pico": 0, "etapa_pico": None}
+    perfil = cProfile.Profile()
+
+    def fotografiar(nombre, momento):
+        actual, pico = tracemalloc.get_traced_memory()
+        if pico > maximo["pico"]:
+            # El pico nuevo ocurrió desde el borde anterior: dentro de la etapa que termina o antes de la que empieza
+            maximo.update(pico=pico, etapa_pico=nombre if momento == "fin" else f"antes de {nombre}")
+        if actual <= maximo["memoria"]:
+            return
+        # La foto no se cuenta en el perfil de tiempo
+        perfil.disable()
+        try:
+            maximo.update(memoria=actual, snapshot=tracemalloc.take_snapshot(), momento=f"{momento} de {nombre}")
+        finally:
+            perfil.enable()
+
+    try:
+        with observar_etapas(fotografiar):
+            perfil.enable()
+            try:
+                return funcion(*args)
+            finally:
+                perfil.disable()
+    finally:
+        actual, pico = tracemalloc.get_traced_memory()
+        if actual > maximo["memoria"]:
+            maximo.update(memoria=actual, snapshot=tracemalloc.take_snapshot(), momento="fin de la corrida")
+        if not ya_activo:
+            tracemalloc.stop()
+        perfil.dump_stats(path_prof)
+        with open(path_reporte, "w", encoding="utf-8") as f:
+            f.write(reporte(cliente, perfil, inicial, maximo, pico, top))
+        print(f"\n🔬 Perfil guardado en {path_prof} y {path_reporte}")
+
+
+def reporte(cliente, perfil, inicial, maximo, pico, top=TOP):
+    """
+    Texto con el top de funciones por tiempo acumulado y propio y el top de
+    líneas por memoria asignada entre el inicio y la foto más alta.
+    :param inicial: snapshot de tracemalloc antes de la corrida
+    :param maximo: dict con memoria, snapshot y momento de la foto más alta
+    """
+    salida = io.StringIO()
+    salida.write(f"Perfil de {cliente} - {datetime.now():%Y-%m-%d %H:%M:%S}\n")
+    salida.write(f"Memoria: pico {pico / 2**20:.1f} MiB, foto más alta {maximo['memoria'] / 2**20:.1f} MiB "
+                 f"({maximo['momento']})\n")
+    if maximo["etapa_pico"] and maximo["pico"] >= pico:
+        salida.write(f"El pico ocurrió en la etapa: {maximo['etapa_pico']}\n")
+
+    for orden, titulo in (("cumulative", "tiempo acumulado"), ("tottime", "tiempo propio")):
+        salida.write(f"\n=== Top {top} funciones por {titulo} ===\n")
+        pstats.Stats(perfil, stream=salida).strip_dirs().sort_stats(orden).print_stats(top)
+
+    # Se ignoran las asignaciones del propio perfilador
+    filtros = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, cProfile.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]
+    diferencias = maximo["snapshot"].filter_traces(filtros).compare_to(inicial.filter_traces(filtros), "lineno")
+    salida.write(f"\n=== Top {top} líneas por memoria asignada hasta la foto más alta ({maximo['momento']}) ===\n")
+    for i, stat in enumerate(diferencias[:top], 1):
+        frame = stat.traceback[0]
+        salida.write(f"{i:>3}. {stat.size_diff / 2**10:>+10.1f} KiB {stat.count_diff:>+8} bloques  "
+                     f"{frame.filename}:{frame.lineno}\n")
+    return salida.getvalue()
@@ -0,0 +1,114 @@
+# utils/plantillas.py
+import copy
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
+
+NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+def escribir_plantilla(plantilla, destino, df, columnas_general=()):
+    """
+    Escribe df en la hoja principal de una plantilla de importación.
+    Lee una sola vez el encabezado, sus estilos y el ancho de columnas de la
+    plantilla y luego escribe todas las filas en modo write_only, respetando
+    el orden de las columnas del encabezado. Las demás hojas (listas de
+    apoyo) y los nombres definidos se copian tal cual.
+    :param plantilla: ruta del Excel con el formato de importación
+    :param destino: ruta donde guardar el resultado (puede ser la misma plantilla)
+    :param df: DataFrame con columnas nombradas como el encabezado
+    :param columnas_general: columnas que se escriben con formato 'General'
+    """
+    wb_src = openpyxl.load_workbook(plantilla, read_only=True)
+    try:
+        ws_src = wb_src.active
+        titulo = ws_src.title
+        encabezado = [_copiar_celda(c) for c in next(ws_src.iter_rows(min_row=1, max_row=1))]
+        anchos = _anchos_columnas(plantilla, getattr(ws_src, "_worksheet_path", None))
+        otras_hojas = [
+            (ws.title, ws.sheet_state, [list(fila) for fila in ws.iter_rows(values_only=True)])
+            for ws in wb_src.worksheets if ws.title != titulo
+        ]
+        nombres_definidos = list(wb_src.defined_names.values())
+    finally:
+        wb_src.close()
+
+    columnas = [c["value"] for c in encabezado]
+    idx_general = [i for i, col in enumerate(columnas) if col in columnas_general]
+
+    # Columnas del encabezado que no vienen en df quedan vacías
+    datos = df.reindex(columns=columnas).astype(object)
+    datos = datos.where(datos.notna() & (datos != ""), None)
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(titulo)
+    for letra, ancho in anchos.items():
+        ws.column_dimensions[letra].width = ancho
+
+    fila_encabezado = []
+    for celda in encabezado:
+        cell = WriteOnlyCell(ws, value=celda["value"])
+        for atributo, valor in celda.items():
+            if atributo != "value":
+                setattr(cell, atributo, valor)
+        fila_encabezado.append(cell)
+    ws.append(fila_encabezado)
+
+    for fila in datos.itertuples(index=False, name=None):
+        fila = list(fila)
+        for i in idx_general:
+            if fila[i] is not None:
+                cell = WriteOnlyCell(ws, value=fila[i])
+                cell.number_format = "General"
+                fila[i] = cell
+        ws.append(fila)
+
+    for titulo_hoja, estado, filas in otras_hojas:
+        ws_otra = wb.create_sheet(titulo_hoja)
+        ws_otra.sheet_state = estado
+        for fila in filas:
+            ws_otra.append(fila)
+
+    for nombre in nombres_definidos:
+        wb.defined_names[nombre.name] = nombre
+
+    # Guardar en un archivo temporal para no dejar la plantilla a medias si algo falla
+    temporal = f"{destino}.tmp"
+    wb.save(temporal)
+    os.replace(temporal, destino)
+
+
+def _copiar_celda(celda):
+    if not getattr(celda, "has_style", False):
+        return {"value": celda.value}
+    return {
+        "value": celda.value,
+        "font": copy.copy(celda.font),
+        "fill": copy.copy(celda.fill),
+        "border": copy.copy(celda.border),
+        "alignment": copy.copy(celda.alignment),
+        "number_format": celda.number_format,
+        "protection": copy.copy(celda.protection),
+    }
+
+
+def _anchos_columnas(plantilla, worksheet_path):
+    """
+    Lee el ancho de columnas de la hoja sin cargar sus filas.
+    El modo read_only de openpyxl no expone column_dimensions.
+    """
+    if not worksheet_path:
+        return {}
+    anchos = {}
+    with zipfile.ZipFile(plantilla) as z, z.open(worksheet_path) as f:
+        for _, elem in ET.iterparse(f, events=("start",)):
+            if elem.tag == f"{NS_MAIN}sheetData":
+                break
+            if elem.tag == f"{NS_MAIN}col" and elem.get("width"):
+                for idx in range(int(elem.get("min")), int(elem.get("max")) + 1):
+                    anchos[get_column_letter(idx)] = float(elem.get("width"))
+    return anchos
@@ -0,0 +1,70 @@
+# utils/registro_clientes.py
+import importlib.util
+import json
+import os
+import sys
+
+from utils.rutas import IMPORTACION_DB, resource_path
+
+CLIENTES_DIR = "clientes"
+
+_disponibles = None
+_cargados = {}
+
+
+def descubrir_clientes():
+    """
+    Clientes disponibles, buscados una sola vez por proceso:
+    módulos clientes/<cliente>.py y clientes de importación de data/importacion_db.json.
+    No importa ningún cliente.
+    :return: dict {nombre en minúsculas: ruta del módulo, o None si es de importación}
+    """
+    global _disponibles
+    if _disponibles is None:
+        disponibles = {}
+        path = resource_path(IMPORTACION_DB)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for cliente in json.load(f).get("Clientes", {}):
+                    disponibles[cliente.lower()] = None
+        if os.path.isdir(CLIENTES_DIR):
+            for archivo in os.listdir(CLIENTES_DIR):
+                nombre, extension = os.path.splitext(archivo)
+                if extension == ".py" and not nombre.startswith("_"):
+                    disponibles[nombre.lower()] = os.path.join(CLIENTES_DIR, archivo)
+        _disponibles = disponibles
+    return _disponibles
+
+
+def cargar_cliente(cliente):
+    """
+    Devuelve el módulo del cliente (con run(df_wms, df_cajas) y COLUMNAS_WMS),
+    ejecutándolo solo la primera vez que se pide. Un módulo de clientes/ tiene
+    prioridad sobre un cliente de importación con el mismo nombre.
+    :return: módulo o proceso de importación, o None si el cliente no existe
+    """
+    clave = cliente.lower()
+    if clave in _cargados:
+        return _cargados[clave]
+    disponibles = descubrir_clientes()
+    if clave not in disponibles:
+        print(f"❌ No se encontró el módulo para cliente '{cliente}' en {CLIENTES_DIR}")
+        return None
+
+    path = disponibles[clave]
+    if path is None:
+        # pandas y openpyxl se cargan recién cuando se usa un cliente de importación
+        from utils.importacion import compilar_importacion
+        modulo = compilar_importacion(cliente)
+    else:
+        nombre_modulo = f"{CLIENTES_DIR}.{clave}"
+        spec = importlib.util.spec_from_file_location(nombre_modulo, path)
+        modulo = importlib.util.module_from_spec(spec)
+        sys.modules[nombre_modulo] = modulo
+        try:
+            spec.loader.exec_module(modulo)
+        except BaseException:
+            del sys.modules[nombre_modulo]
+            raise
+    _cargados[clave] = modulo
+    return modulo
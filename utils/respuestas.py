@@ -0,0 +1,85 @@
+# utils/respuestas.py
+import builtins
+import json
+from collections import deque
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import questionary
+
+PREGUNTAS_QUESTIONARY = ("select", "checkbox", "confirm", "text")
+
+# None fuera de respuestas_predefinidas; si no, si se retoma una sesión guardada
+_retomar_sesion = None
+
+
+def cargar_respuestas(path):
+    """
+    Lee un archivo JSON de respuestas para ejecutar un cliente sin interacción.
+    Acepta una lista de respuestas o un dict con la clave "respuestas".
+    Las respuestas se consumen en el orden en que el proceso las pide.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        datos = json.load(f)
+    if isinstance(datos, dict):
+        datos = datos.get("respuestas", [])
+    if not isinstance(datos, list):
+        raise ValueError(f"El archivo de respuestas {path} debe contener una lista.")
+    return datos
+
+
+def retomar_sesion_predefinido():
+    """
+    Qué hacer con una sesión sin terminar cuando las respuestas vienen de un
+    archivo: None si hay un operador para preguntarle, True/False si no.
+    """
+    return _retomar_sesion
+
+
+@contextmanager
+def respuestas_predefinidas(respuestas, retomar_sesion=False):
+    """
+    Reemplaza input() y los menús de questionary por una lista de respuestas.
+    Cada input(), select(), checkbox() o confirm() consume una respuesta; en
+    select/confirm una respuesta null equivale a aceptar el valor por defecto.
+    Si se acaban las respuestas se lanza EOFError, igual que input() sin entrada.
+    Una sesión sin terminar del mismo pedido no consume respuestas: se descarta,
+    o se retoma si retomar_sesion es True.
+    :param respuestas: lista de respuestas (str, número, bool o lista para checkbox)
+    :return: (en el with) las respuestas que quedan sin usar
+    """
+    global _retomar_sesion
+    # deque: en pedidos grandes hay miles de respuestas y pop(0) de una lista es O(n)
+    pendientes = deque(respuestas)
+
+    def siguiente(mensaje):
+        if not pendientes:
+            raise EOFError(f"No quedan respuestas para: {mensaje}")
+        respuesta = pendientes.popleft()
+        print(f"{mensaje} {respuesta}")
+        return respuesta
+
+    def input_predefinido(mensaje=""):
+        respuesta = siguiente(mensaje)
+        return "" if respuesta is None else str(respuesta)
+
+    def pregunta(mensaje, *args, default=None, **kwargs):
+        def ask():
+            respuesta = siguiente(mensaje)
+            return default if respuesta is None else respuesta
+        return SimpleNamespace(ask=ask, unsafe_ask=ask)
+
+    input_original = builtins.input
+    preguntas_originales = {nombre: getattr(questionary, nombre) for nombre in PREGUNTAS_QUESTIONARY}
+    retomar_anterior = _retomar_sesion
+    _retomar_sesion = bool(retomar_sesion)
+    builtins.input = input_predefinido
+    for nombre in PREGUNTAS_QUESTIONARY:
+        setattr(questionary, nombre, pregunta)
+    try:
+        yield pendientes
+    finally:
+        _retomar_sesion = retomar_anterior
+        builtins.input = input_original
+        for nombre, original in preguntas_originales.items():
+            setattr(questionary, nombre, original)
@@ -0,0 +1,46 @@
+# utils/rutas.py
+import os
+import sys
+
+DATA_DIR = "data"
+IMPORTACION_DB = os.path.join(DATA_DIR, "importacion_db.json")
+OUTPUT_DIR = "output"
+# Carpeta donde se escriben los resultados; por defecto output/.
+# El procesamiento por lotes le da a cada trabajo su propia carpeta.
+VARIABLE_SALIDA = "UPPERAPP_SALIDA"
+
+
+def resource_path(relative_path):
+    """Obtiene la ruta absoluta, compatible con PyInstaller"""
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+
+    return os.path.join(base_path, relative_path)
+
+
+def directorio_salida():
+    return os.environ.get(VARIABLE_SALIDA) or OUTPUT_DIR
+
+
+def ruta_salida(*partes):
+    """
+    Ruta de un archivo de resultado dentro de la carpeta de salida, creando
+    las carpetas intermedias.
+    :param partes: ruta relativa a la carpeta de salida, ej. ("JAL", "importar tottus.xlsx")
+    """
+    path = os.path.join(directorio_salida(), *partes)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def ruta_en_salida(path):
+    """
+    Lleva a la carpeta de salida configurada una ruta escrita bajo output/
+    (ej. la plantilla "output/JAL/importar tottus.xlsx"). Otras rutas quedan igual.
+    """
+    relativa = os.path.relpath(path, OUTPUT_DIR)
+    if relativa.startswith(os.pardir):
+        return path
+    return ruta_salida(relativa)
@@ -0,0 +1,135 @@
+# utils/salidas.py
+import os
+from contextlib import suppress
+
+import pandas as pd
+
+# Filas que se convierten y escriben de una vez; acota la memoria en hojas grandes
+FILAS_POR_BLOQUE = 50_000
+# Copias adicionales de cada hoja para sistemas que no leen Excel, ej. "csv" o "csv,parquet"
+VARIABLE_FORMATOS = "UPPERAPP_FORMATOS_EXTRA"
+FORMATOS_EXTRA = ("csv", "parquet")
+
+
+def motor_excel():
+    """
+    xlsxwriter en modo constant_memory si está instalado; si no, openpyxl en
+    modo write_only. Los dos escriben las filas a disco a medida que llegan.
+    """
+    try:
+        import xlsxwriter  # noqa: F401
+    except ImportError:
+        return "openpyxl"
+    return "xlsxwriter"
+
+
+def bloques(df, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Filas del DataFrame como tuplas de valores de Python (NaN como celda vacía),
+    convirtiendo un bloque a la vez.
+    """
+    for inicio in range(0, len(df), filas_por_bloque):
+        bloque = df.iloc[inicio:inicio + filas_por_bloque].astype(object)
+        bloque = bloque.where(bloque.notna(), None)
+        yield from bloque.itertuples(index=False, name=None)
+
+
+def guardar_excel(path, hojas, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Escribe las hojas en un xlsx sin armar el libro completo en memoria, con el
+    encabezado en negrita como pd.ExcelWriter y sin índice. Si UPPERAPP_FORMATOS_EXTRA
+    lo pide, deja además cada hoja en CSV o Parquet junto al xlsx.
+    :param hojas: dict {nombre de hoja: DataFrame}, en el orden en que van en el libro
+    """
+    if motor_excel() == "xlsxwriter":
+        _guardar_xlsxwriter(path, hojas, filas_por_bloque)
+    else:
+        _guardar_openpyxl(path, hojas, filas_por_bloque)
+    guardar_extras(path, hojas)
+
+
+def _guardar_xlsxwriter(path, hojas, filas_por_bloque):
+    import xlsxwriter
+
+    libro = xlsxwriter.Workbook(path, {"constant_memory": True, "default_date_format": "yyyy-mm-dd hh:mm:ss"})
+    negrita = libro.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+    try:
+        for nombre, df in hojas.items():
+            hoja = libro.add_worksheet(nombre)
+            hoja.write_row(0, 0, [str(c) for c in df.columns], negrita)
+            for fila, valores in enumerate(bloques(df, filas_por_bloque), start=1):
+                hoja.write_row(fila, 0, valores)
+    finally:
+        libro.close()
+
+
+def _guardar_openpyxl(path, hojas, filas_por_bloque):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    libro = Workbook(write_only=True)
+    borde = Side(style="thin")
+    for nombre, df in hojas.items():
+        hoja = libro.create_sheet(nombre)
+        encabezado = []
+        for columna in df.columns:
+            celda = WriteOnlyCell(hoja, value=str(columna))
+            celda.font = Font(bold=True)
+            celda.border = Border(left=borde, right=borde, top=borde, bottom=borde)
+            celda.alignment = Alignment(horizontal="center", vertical="top")
+            encabezado.append(celda)
+        hoja.append(encabezado)
+        for valores in bloques(df, filas_por_bloque):
+            hoja.append(valores)
+    libro.save(path)
+
+
+def formatos_extra():
+    valor = os.environ.get(VARIABLE_FORMATOS, "")
+    formatos = [f.strip().lower() for f in valor.split(",") if f.strip()]
+    for f in formatos:
+        if f not in FORMATOS_EXTRA:
+            print(f"⚠️ Formato '{f}' no soportado en {VARIABLE_FORMATOS} (use {', '.join(FORMATOS_EXTRA)}).")
+    return [f for f in formatos if f in FORMATOS_EXTRA]
+
+
+def guardar_extras(path, hojas, formatos=None):
+    """
+    Copia cada hoja en CSV (UTF-8) o Parquet junto al xlsx: <archivo>.csv si el
+    libro tiene una sola hoja, <archivo>_<hoja>.csv si tiene varias.
+    Son salidas opcionales: si una hoja no se puede escribir (archivo abierto,
+    columnas que Arrow no convierte, falta pyarrow) se avisa y se sigue, sin
+    cortar el proceso del cliente.
+    :return: lista de archivos escritos
+    """
+    formatos = formatos_extra() if formatos is None else formatos
+    base = os.path.splitext(path)[0]
+    escritos = []
+    for formato in formatos:
+        for nombre, df in hojas.items():
+            destino = f"{base}.{formato}" if len(hojas) == 1 else f"{base}_{nombre}.{formato}"
+            try:
+                if formato == "csv":
+                    df.to_csv(destino, index=False, encoding="utf-8")
+                else:
+                    _guardar_parquet(df, destino)
+            except ImportError:
+                print("⚠️ Falta pyarrow para escribir Parquet. Se omite esa salida.")
+                break
+            except (OSError, ValueError, TypeError, NotImplementedError) as e:
+                # Los errores de conversión de pyarrow heredan de ValueError, TypeError o NotImplementedError
+                print(f"⚠️ No se pudo escribir {destino} ({type(e).__name__}: {e}). Se omite esa salida.")
+                if os.path.exists(destino):
+                    with suppress(OSError):
+                        os.remove(destino)
+                continue
+            escritos.append(destino)
+    return escritos
+
+
+def _guardar_parquet(df, destino):
+    # Columnas con tipos mezclados (ej. Material numérico o texto) van como texto
+    mixtas = [c for c in df.columns if pd.api.types.infer_dtype(df[c], skipna=True).startswith("mixed")]
+    df.assign(**{c: df[c].map(lambda v: None if pd.isna(v) else str(v)) for c in mixtas}) \
+        .to_parquet(destino, index=False)
@@ -1,12 +1,14 @@
 # utils/seleccion_archivo.py
-from tkinter import Tk, filedialog
 
 def seleccionar_archivo(tipo="excel"):
     """
     Abre un diálogo para seleccionar archivo Excel, CSV o TXT.
+    tkinter se importa recién aquí: el menú y los procesos sin diálogo no lo necesitan.
     :param tipo: "excel", "csv" o "txt"
     :return: ruta del archivo seleccionado o None
     """
+    from tkinter import Tk, filedialog
+
     root = Tk()
     root.withdraw()  # Oculta ventana principal
     root.attributes('-topmost', True)  # Poner ventana sobre otras
@@ -0,0 +1,153 @@
+# utils/sesion.py
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+import questionary
+
+from utils.respuestas import retomar_sesion_predefinido
+from utils.rutas import directorio_salida
+
+SESIONES = "sesiones"
+
+
+def ruta_sesion(cliente, df_wms):
+    """
+    Ruta del diario de sesión de un pedido. El nombre depende del cliente y del
+    contenido del WMS, así al volver a cargar el mismo pedido se encuentra su diario.
+    """
+    huella = pd.util.hash_pandas_object(df_wms.astype(str), index=False).to_numpy()
+    clave = hashlib.sha256(huella.tobytes()).hexdigest()[:16]
+    return os.path.join(directorio_sesiones(), f"{cliente.lower()}_{clave}.jsonl")
+
+
+def directorio_sesiones():
+    return os.path.join(directorio_salida(), SESIONES)
+
+
+def abrir_sesion(cliente, df_wms):
+    """
+    Abre el diario de sesión del pedido. Si quedó una sesión sin terminar
+    (corte, Ctrl-C o cancelación) pregunta si retomarla. Con respuestas de un
+    archivo no se pregunta: se empieza de nuevo salvo que se pida retomar
+    (main.py run --resume), para que las respuestas no se corran de pregunta.
+    :return: dict con 'path' del diario y 'estado' reconstruido (ver estado_inicial)
+    """
+    path = ruta_sesion(cliente, df_wms)
+    registros = leer_registros(path)
+    if registros:
+        retomar = retomar_sesion_predefinido()
+        if retomar is None:
+            opcion = questionary.select(
+                f"Se encontró una sesión sin terminar de este pedido ({len(registros)} registros).",
+                choices=["Retomar", "Empezar de nuevo"]
+            ).ask()
+        else:
+            opcion = "Retomar" if retomar else "Empezar de nuevo"
+            print(f"Se encontró una sesión sin terminar de este pedido ({len(registros)} registros): {opcion}.")
+        if opcion == "Empezar de nuevo":
+            os.remove(path)
+            registros = []
+        else:
+            print("🔁 Retomando sesión guardada...")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    estado = estado_inicial()
+    for registro in registros:
+        aplicar_registro(estado, registro)
+    return {"path": path, "estado": estado}
+
+
+def estado_inicial():
+    """
+    Estado de una sesión sin respuestas:
+    lleva_pallets: respuesta a si el pedido lleva pallets (None si no se ha respondido)
+    pallets: lista de pallets ya armados
+    pallets_listos: True cuando terminó la etapa de pallets
+    bultos: dict {LPN: {Peso (kg), TipoCaja, Alto (cm), Largo (cm), Ancho (cm)}}
+    pos_material: dict {CodItem: {Pos, Material}}
+    """
+    return {
+        "lleva_pallets": None,
+        "pallets": [],
+        "pallets_listos": False,
+        "bultos": {},
+        "pos_material": {},
+    }
+
+
+def aplicar_registro(estado, registro):
+    """
+    Aplica un registro del diario sobre el estado. Un registro posterior
+    reemplaza al anterior del mismo LPN o CodItem.
+    """
+    tipo = registro["tipo"]
+    if tipo == "lleva_pallets":
+        estado["lleva_pallets"] = registro["valor"]
+    elif tipo == "pallet":
+        estado["pallets"].append(registro["pallet"])
+    elif tipo == "pallets_listos":
+        estado["pallets_listos"] = True
+    elif tipo == "reiniciar_pallets":
+        estado["lleva_pallets"] = None
+        estado["pallets"] = []
+        estado["pallets_listos"] = False
+    elif tipo == "bulto":
+        estado["bultos"][registro["LPN"]] = registro["bulto"]
+    elif tipo == "deshacer_bulto":
+        estado["bultos"].pop(registro["LPN"], None)
+    elif tipo == "pos_material":
+        estado["pos_material"][registro["CodItem"]] = {"Pos": registro["Pos"], "Material": registro["Material"]}
+
+
+def registrar(sesion, tipo, **datos):
+    """
+    Agrega un registro al diario y lo aplica al estado de la sesión.
+    El registro se fuerza a disco para que un corte no pierda lo ya ingresado.
+    """
+    registro = {"tipo": tipo, **datos}
+    with open(sesion["path"], "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False, default=_a_json) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    aplicar_registro(sesion["estado"], registro)
+
+
+def leer_registros(path):
+    """
+    Lee los registros del diario en orden. Una última línea incompleta
+    (proceso cortado mientras escribía) se descarta.
+    """
+    if not os.path.exists(path):
+        return []
+    registros = []
+    with open(path, "r", encoding="utf-8") as f:
+        for linea in f:
+            try:
+                registros.append(json.loads(linea))
+            except json.JSONDecodeError:
+                break
+    return registros
+
+
+def cerrar_sesion(sesion):
+    """
+    Marca la sesión como terminada moviendo el diario a sesiones/terminadas,
+    de modo que el pedido no vuelva a ofrecer retomarla.
+    """
+    path = sesion["path"]
+    if not os.path.exists(path):
+        return
+    terminadas = os.path.join(os.path.dirname(path), "terminadas")
+    os.makedirs(terminadas, exist_ok=True)
+    nombre = os.path.splitext(os.path.basename(path))[0]
+    os.replace(path, os.path.join(terminadas, f"{nombre}_{datetime.now():%Y%m%d_%H%M%S}.jsonl"))
+
+
+def _a_json(valor):
+    # Valores numpy (int64, float64) que vienen de df_cajas o del WMS
+    if hasattr(valor, "item"):
+        return valor.item()
+    return str(valor)
@@ -0,0 +1,242 @@
+# utils/telemetria.py
+import builtins
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import questionary
+
+from utils.respuestas import PREGUNTAS_QUESTIONARY
+from utils.rutas import OUTPUT_DIR
+
+# Archivo JSONL con una línea por corrida; "no" desactiva la telemetría
+VARIABLE_TELEMETRIA = "UPPERAPP_TELEMETRIA"
+TELEMETRIA_FILE = os.path.join(OUTPUT_DIR, "telemetria.jsonl")
+DESACTIVADA = ("0", "no", "off")
+
+_corrida = None
+# Función(nombre de etapa, "inicio" o "fin") que se llama en cada borde de etapa, ej. el perfilador
+_observador = None
+
+
+def ruta_log():
+    """
+    Ruta del log de telemetría, o None si está desactivada.
+    """
+    valor = os.environ.get(VARIABLE_TELEMETRIA, "").strip()
+    if valor.lower() in DESACTIVADA:
+        return None
+    return valor or TELEMETRIA_FILE
+
+
+@contextmanager
+def corrida(cliente, **datos):
+    """
+    Mide una corrida completa de un cliente y al terminar agrega una línea al
+    log con el tiempo total, el tiempo esperando al operador (input, menús,
+    balanza y diálogos) y el de cada etapa.
+    :param datos: campos extra del registro, ej. owner="GSP", modo="headless"
+    :return: (en el with) dict del registro; se puede marcar registro["estado"] = "error"
+    """
+    global _corrida
+    path = ruta_log()
+    if path is None or _corrida is not None:
+        # Desactivada, o una corrida dentro de otra: se mide solo la de afuera
+        yield {}
+        return
+
+    registro = {"fecha": datetime.now().isoformat(timespec="seconds"), "cliente": cliente, **datos,
+                "estado": "ok", "espera": 0.0, "preguntas": 0, "etapas": []}
+    _corrida = registro
+    inicio = time.perf_counter()
+    try:
+        with _medir_preguntas():
+            yield registro
+    except BaseException as e:
+        registro["estado"] = "cancelado" if isinstance(e, KeyboardInterrupt) else "error"
+        registro["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _corrida = None
+        registro["segundos"] = round(time.perf_counter() - inicio, 4)
+        registro["espera"] = round(registro["espera"], 4)
+        registro["calculo"] = round(registro["segundos"] - registro["espera"], 4)
+        _guardar(path, registro)
+
+
+@contextmanager
+def etapa(nombre, filas=None):
+    """
+    Mide una etapa de la corrida en curso. Sirve como with o como decorador:
+        with etapa("leer_wms") as e:
+            df = ...
+            e["filas"] = len(df)
+    Fuera de una corrida no registra nada.
+    :return: (en el with) dict de la etapa, para agregar filas u otros datos
+    """
+    datos = {"nombre": nombre}
+    if filas is not None:
+        datos["filas"] = filas
+    registro = _corrida
+    espera_inicial = registro["espera"] if registro is not None else 0.0
+    if _observador is not None:
+        _observador(nombre, "inicio")
+    inicio = time.perf_counter()
+    try:
+        yield datos
+    finally:
+        if _observador is not None:
+            _observador(nombre, "fin")
+        if registro is not None:
+            datos["segundos"] = round(time.perf_counter() - inicio, 4)
+            datos["espera"] = round(registro["espera"] - espera_inicial, 4)
+            registro["etapas"].append(datos)
+
+
+@contextmanager
+def observar_etapas(funcion):
+    """
+    Llama a funcion(nombre, "inicio" | "fin") en cada borde de etapa mientras
+    dura el with, aunque la telemetría esté desactivada.
+    """
+    global _observador
+    anterior = _observador
+    _observador = funcion
+    try:
+        yield
+    finally:
+        _observador = anterior
+
+
+@contextmanager
+def espera():
+    """
+    Marca como tiempo del operador un bloque que no pasa por input ni por
+    questionary (ej. esperar la balanza o el diálogo de archivos).
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if _corrida is not None:
+            _corrida["espera"] += time.perf_counter() - inicio
+
+
+def _esperando(funcion):
+    def medida(*args, **kwargs):
+        _corrida["preguntas"] += 1
+        with espera():
+            return funcion(*args, **kwargs)
+    return medida
+
+
+@contextmanager
+def _medir_preguntas():
+    """
+    Envuelve input() y los menús de questionary para contar su tiempo como espera del operador.
+    """
+    input_original = builtins.input
+    preguntas_originales = {nombre: getattr(questionary, nombre) for nombre in PREGUNTAS_QUESTIONARY}
+
+    def envolver(crear_pregunta):
+        def pregunta(*args, **kwargs):
+            q = crear_pregunta(*args, **kwargs)
+            for metodo in ("ask", "unsafe_ask"):
+                if hasattr(q, metodo):
+                    setattr(q, metodo, _esperando(getattr(q, metodo)))
+            return q
+        return pregunta
+
+    builtins.input = _esperando(input_original)
+    for nombre, original in preguntas_originales.items():
+        setattr(questionary, nombre, envolver(original))
+    try:
+        yield
+    finally:
+        builtins.input = input_original
+        for nombre, original in preguntas_originales.items():
+            setattr(questionary, nombre, original)
+
+
+def _guardar(path, registro):
+    directorio = os.path.dirname(path)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    # Una sola escritura por corrida: los procesos de un lote comparten el log
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+
+def leer_log(path=None):
+    path = path or ruta_log() or TELEMETRIA_FILE
+    if not os.path.exists(path):
+        return []
+    corridas = []
+    with open(path, "r", encoding="utf-8") as f:
+        for linea in f:
+            try:
+                corridas.append(json.loads(linea))
+            except json.JSONDecodeError:
+                continue
+    return corridas
+
+
+def percentil(valores, p):
+    """
+    Percentil p (0-100) por rango más cercano.
+    """
+    ordenados = sorted(valores)
+    if not ordenados:
+        return None
+    indice = max(0, -(-len(ordenados) * p // 100) - 1)
+    return ordenados[int(indice)]
+
+
+def resumir(corridas, cliente=None):
+    """
+    p50 y p95 por cliente y etapa del tiempo total, del tiempo de cálculo
+    (sin la espera del operador) y de las filas. No cuenta las corridas perfiladas.
+    :return: lista de dicts ordenada por cliente y orden de las etapas
+    """
+    grupos = {}
+    for c in corridas:
+        if cliente and c["cliente"].lower() != cliente.lower():
+            continue
+        if c.get("perfilado"):
+            # cProfile y tracemalloc hacen la corrida varias veces más lenta
+            continue
+        grupos.setdefault((c["cliente"], "(corrida)"), []).append(c)
+        for e in c.get("etapas", []):
+            grupos.setdefault((c["cliente"], e["nombre"]), []).append(e)
+
+    resumen = []
+    for (nombre_cliente, nombre_etapa), medidas in grupos.items():
+        totales = [m["segundos"] for m in medidas]
+        calculos = [m["segundos"] - m.get("espera", 0.0) for m in medidas]
+        filas = [m["filas"] for m in medidas if m.get("filas") is not None]
+        resumen.append({
+            "cliente": nombre_cliente,
+            "etapa": nombre_etapa,
+            "n": len(medidas),
+            "p50": percentil(totales, 50),
+            "p95": percentil(totales, 95),
+            "calculo_p50": percentil(calculos, 50),
+            "calculo_p95": percentil(calculos, 95),
+            "filas_p50": percentil(filas, 50),
+        })
+    # sorted es estable: dentro de cada cliente las etapas quedan en el orden en que ocurren
+    return sorted(resumen, key=lambda r: r["cliente"])
+
+
+def imprimir_resumen(resumen):
+    if not resumen:
+        print("No hay corridas registradas.")
+        return
+    print(f"{'Cliente':<12} {'Etapa':<22} {'n':>5} {'p50 s':>9} {'p95 s':>9} {'cálc p50':>9} {'cálc p95':>9} {'filas p50':>10}")
+    print("-" * 92)
+    for r in resumen:
+        filas = "-" if r["filas_p50"] is None else f"{r['filas_p50']:,}"
+        print(f"{r['cliente']:<12} {r['etapa']:<22} {r['n']:>5} {r['p50']:>9.3f} {r['p95']:>9.3f} "
+              f"{r['calculo_p50']:>9.3f} {r['calculo_p95']:>9.3f} {filas:>10}")
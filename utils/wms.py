@@ -0,0 +1,164 @@
+# utils/wms.py
+import hashlib
+import importlib.util
+import json
+import os
+from contextlib import suppress
+
+import numpy as np
+import pandas as pd
+
+# pyarrow es opcional: si no está instalado se usa el motor C de pandas
+# y los Excel se leen siempre sin caché
+HAY_PYARROW = importlib.util.find_spec("pyarrow") is not None
+MOTOR_CSV = "pyarrow" if HAY_PYARROW else "c"
+
+CACHE_DIR = os.path.join("cache", "wms")
+CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+
+def leer_archivo_wms(archivo_wms, columnas=None):
+    """
+    Lee el archivo WMS exportado (CSV o Excel) como DataFrame.
+    :param archivo_wms: ruta del archivo .csv, .xlsx o .xls
+    :param columnas: dict {columna: dtype} con las columnas que usa el cliente
+                     (dtype None deja que pandas lo infiera). Si es None se leen todas.
+    :return: DataFrame solo con las columnas pedidas que existen en el archivo
+    """
+    if archivo_wms.lower().endswith(".csv"):
+        return _leer_csv(archivo_wms, columnas)
+    return _leer_excel(archivo_wms, columnas)
+
+
+def _tipos(columnas, disponibles):
+    return {c: t for c, t in columnas.items() if t is not None and c in disponibles}
+
+
+def _tipos_lectura(columnas, disponibles):
+    # "string" conserva los vacíos como NA en los dos motores; con str el motor
+    # pyarrow los devuelve como el texto 'None'
+    return {c: "string" if t == "str" else t for c, t in _tipos(columnas, disponibles).items()}
+
+
+def _como_texto(serie):
+    """
+    Columna declarada "str": valores como texto y los vacíos como NaN, igual
+    que si la columna se leyera sin tipo.
+    """
+    return serie.astype(object).where(serie.notna(), np.nan).map(str, na_action="ignore")
+
+
+def _aplicar_texto(df, columnas):
+    for c, t in columnas.items():
+        if t == "str" and c in df.columns:
+            df[c] = _como_texto(df[c])
+    return df
+
+
+def _leer_csv(archivo_wms, columnas):
+    if columnas is None:
+        return pd.read_csv(archivo_wms, sep=",", encoding="latin1")
+
+    # Leer solo el encabezado para no pedir columnas que el archivo no trae
+    encabezado = pd.read_csv(archivo_wms, sep=",", encoding="latin1", nrows=0).columns
+    usecols = [c for c in encabezado if c in columnas]
+    df = pd.read_csv(
+        archivo_wms,
+        sep=",",
+        encoding="latin1",
+        engine=MOTOR_CSV,
+        usecols=usecols,
+        dtype=_tipos_lectura(columnas, usecols),
+    )
+    return _aplicar_texto(df, columnas)
+
+
+def _leer_excel(archivo_wms, columnas):
+    clave = _clave_cache(archivo_wms, columnas) if HAY_PYARROW else None
+    df = _leer_cache(clave) if clave else None
+    if df is None:
+        if columnas is None:
+            df = pd.read_excel(archivo_wms)
+        else:
+            df = pd.read_excel(archivo_wms, usecols=lambda c: c in columnas)
+        if clave:
+            _guardar_cache(clave, df)
+
+    if columnas is None:
+        return df
+    # Parquet no conserva todas las categorías, por eso los tipos se aplican al final
+    tipos = {c: t for c, t in _tipos(columnas, df.columns).items() if t != "str"}
+    return _aplicar_texto(df.astype(tipos), columnas)
+
+
+def _clave_cache(archivo_wms, columnas):
+    """
+    Hash del contenido del archivo y de las columnas pedidas.
+    Un mismo archivo con otro nombre reutiliza la caché; uno modificado no.
+    """
+    h = hashlib.sha256()
+    with open(archivo_wms, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloque)
+    h.update(json.dumps(columnas, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _leer_cache(clave):
+    path = os.path.join(CACHE_DIR, f"{clave}.parquet")
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception:
+        # Archivo de caché dañado (o borrado por otro proceso): se vuelve a leer el Excel
+        with suppress(OSError):
+            os.remove(path)
+        return None
+    with suppress(OSError):
+        os.utime(path)  # Marca de uso reciente para el desalojo LRU
+    return df
+
+
+def _guardar_cache(clave, df):
+    """
+    Guarda el DataFrame en la caché. Los procesos de un lote comparten la
+    carpeta: se escribe en un archivo temporal por proceso y se reemplaza de una
+    vez, así nadie lee un Parquet a medio escribir. Un error de la caché nunca
+    hace fallar la lectura del WMS.
+    """
+    path = os.path.join(CACHE_DIR, f"{clave}.parquet")
+    temporal = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        df.to_parquet(temporal, index=False)
+        os.replace(temporal, path)
+    except Exception:
+        # Columnas con tipos mezclados no se pueden guardar en Parquet; se sigue sin caché
+        with suppress(OSError):
+            os.remove(temporal)
+        return
+    _desalojar_cache()
+
+
+def _desalojar_cache(max_bytes=CACHE_MAX_BYTES):
+    """
+    Elimina los archivos usados hace más tiempo hasta que la caché quepa en max_bytes.
+    Otro proceso puede borrar archivos mientras tanto; esos se saltan.
+    """
+    archivos = []
+    with suppress(OSError):
+        for nombre in os.listdir(CACHE_DIR):
+            if not nombre.endswith(".parquet"):
+                continue
+            path = os.path.join(CACHE_DIR, nombre)
+            with suppress(OSError):
+                info = os.stat(path)
+                archivos.append((info.st_mtime, info.st_size, path))
+    archivos.sort(reverse=True)
+    total = 0
+    for _, tamano, path in archivos:
+        total += tamano
+        if total > max_bytes:
+            with suppress(OSError):
+                os.remove(path)
@@ -0,0 +1,67 @@
+# utils/zpl.py
+import numpy as np
+import pandas as pd
+
+# Tamaños a 203 dpi (8 puntos por mm)
+ETIQUETA_PEQ = {"ancho": 812, "largo": 406, "fuente": 30, "interlineado": 50}
+ETIQUETA_GRANDE = {"ancho": 812, "largo": 1218, "fuente": 40, "interlineado": 100}
+
+
+def escapar_zpl(valor):
+    """
+    Escapa un valor para ^FD usando ^FH: '^', '~' y '\\' pasan a hexadecimal.
+    """
+    texto = "" if pd.isna(valor) else str(valor)
+    return texto.replace("\\", "\\5C").replace("^", "\\5E").replace("~", "\\7E")
+
+
+def agrupar_repetidas(df):
+    """
+    Junta filas idénticas consecutivas.
+    :return: DataFrame con una fila por tramo y la columna _copias con el largo del tramo
+    """
+    if df.empty:
+        return df.assign(_copias=pd.Series(dtype="int64"))
+    inicio_tramo = df.ne(df.shift()).any(axis=1).to_numpy()
+    copias = np.bincount(np.cumsum(inicio_tramo))[1:]
+    return df[inicio_tramo].assign(_copias=copias)
+
+
+def iterar_zpl(df, formato):
+    """
+    Genera el ZPL de cada etiqueta, una línea de texto "COLUMNA: valor" por columna.
+    Las etiquetas idénticas seguidas se imprimen una vez con ^PQ y la cantidad de copias.
+    :param df: DataFrame con una fila por etiqueta
+    :param formato: dict con ancho, largo, fuente e interlineado en puntos (ver ETIQUETA_PEQ)
+    """
+    columnas = list(df.columns)
+    for fila in agrupar_repetidas(df).itertuples(index=False, name=None):
+        *valores, copias = fila
+        lineas = [
+            "^XA",
+            "^CI28",
+            f"^PW{formato['ancho']}",
+            f"^LL{formato['largo']}",
+        ]
+        for i, (columna, valor) in enumerate(zip(columnas, valores)):
+            y = 30 + i * formato["interlineado"]
+            lineas.append(
+                f"^FO30,{y}^A0N,{formato['fuente']},{formato['fuente']}"
+                f"^FH\\^FD{escapar_zpl(columna)}: {escapar_zpl(valor)}^FS"
+            )
+        lineas.append(f"^PQ{copias}")
+        lineas.append("^XZ")
+        yield "\n".join(lineas) + "\n"
+
+
+def escribir_zpl(path, df, formato):
+    """
+    Escribe en path las etiquetas de df listas para enviar a la impresora Zebra.
+    :return: cantidad de etiquetas ZPL escritas (sin contar copias)
+    """
+    escritas = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for etiqueta in iterar_zpl(df, formato):
+            f.write(etiqueta)
+            escritas += 1
+    return escritas